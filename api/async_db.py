@@ -0,0 +1,90 @@
+"""
+FastAPI glue for DB_MODE=async
+Handlers keep their synchronous ORM bodies. In async mode they are driven through
+AsyncSession.run_sync: SQLAlchemy runs the body in a greenlet on the event loop and
+every query awaits asyncpg, so requests no longer hold a threadpool slot.
+Code that opens its own SessionLocal (catalog index/cache loads, exports) stays on
+the sync engine. So that none of it runs on the event loop, db_route resolves the
+catalog version, index and snapshot first (in the threadpool when they are stale)
+and pins them for the handler body.
+"""
+import functools
+import inspect
+
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+
+from catalog_cache import catalog_pinned, fresh_catalog, load_catalog
+from database import DB_MODE, AsyncReadSessionLocal, AsyncSessionLocal, async_replicas, get_db, get_read_db
+from read_your_writes import get_user_read_db, wrote_recently
+
+
+async def get_async_db():
+    """AsyncSession dependency (DB_MODE=async)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """get_read_db for DB_MODE=async (the replica connection is made on the first query)"""
+    async with (AsyncReadSessionLocal() if async_replicas.engines else AsyncSessionLocal()) as db:
+        yield db
+
+
+async def get_async_user_read_db(request: Request):
+    """get_user_read_db for DB_MODE=async"""
+    session = AsyncSessionLocal if wrote_recently(request) or not async_replicas.engines else AsyncReadSessionLocal
+    async with session() as db:
+        yield db
+
+
+# Sync session dependency -> its async counterpart, used by db_route
+ASYNC_DEPENDENCIES = {
+    get_db: get_async_db,
+    get_read_db: get_async_read_db,
+    get_user_read_db: get_async_user_read_db
+}
+
+
+# Session dependency for async def handlers; pass it to run_db
+get_session = get_async_db if DB_MODE == "async" else get_db
+
+
+async def run_db(db, fn, *args):
+    """
+    Run fn(session, *args) from an async def handler without blocking the event loop:
+    through the greenlet bridge for an AsyncSession, in the threadpool for a Session
+    """
+    if hasattr(db, "run_sync"):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+
+
+def db_route(handler):
+    """
+    Decorator for sync handlers taking `db: Session = Depends(get_db)` (or get_read_db /
+    get_user_read_db). In async mode the route becomes a coroutine receiving the matching
+    AsyncSession that runs the unchanged body via run_sync; in sync mode the handler is
+    returned as is.
+    """
+    if DB_MODE != "async":
+        return handler
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    signature = inspect.signature(handler)
+    parameters = [
+        parameter.replace(annotation=AsyncSession, default=Depends(ASYNC_DEPENDENCIES[parameter.default.dependency]))
+        if name == "db" else parameter
+        for name, parameter in signature.parameters.items()
+    ]
+
+    @functools.wraps(handler)
+    async def route(**kwargs):
+        db = kwargs.pop("db")
+        index, snapshot = fresh_catalog() or await run_in_threadpool(load_catalog)
+        with catalog_pinned(index, snapshot):
+            return await db.run_sync(lambda session: handler(db=session, **kwargs))
+
+    route.__signature__ = signature.replace(parameters=parameters)
+    return route
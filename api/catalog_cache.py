@@ -0,0 +1,319 @@
+"""
+Read-through in-process catalog cache
+Problems, solutions and roadmaps only change when the catalog is re-synced, so
+the read endpoints are served from an immutable in-memory snapshot instead of
+re-querying Postgres on every request.
+
+A snapshot is tied to one CatalogIndex (and therefore one catalog version).
+When the index is rebuilt after database_metadata.last_sync moves, the next
+reader loads a fresh snapshot and swaps it in atomically; in-flight requests
+keep using the snapshot they already hold.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from database import SessionLocal
+from models import CodeBlob, Solution, Roadmap, RoadmapProblem
+from catalog_index import (
+    CatalogIndex,
+    ProblemEntry,
+    catalog_index_pinned,
+    fresh_catalog_index,
+    get_catalog_index
+)
+from code_store import code_fingerprint, decompress_code
+from pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class SolutionRecord(NamedTuple):
+    id: int
+    problem_id: int
+    language: str
+    code: str
+    source: Optional[str]
+    contributor_github: Optional[str]
+    contributed_at: Optional[datetime]
+    created_at: Optional[datetime]
+    code_length: int
+    code_hash: str
+
+
+class RoadmapRecord(NamedTuple):
+    name: str
+    display_name: str
+    description: Optional[str]
+    category: Optional[str]
+    total_problems: Optional[int]
+    problem_ids: Tuple[int, ...]  # sheet order (roadmap_problems)
+    positions: Tuple[int, ...]  # roadmap_problems.position of each problem_ids entry
+    difficulty_distribution: Optional[dict]
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog for one version"""
+
+    __slots__ = (
+        "version", "index", "problem_ids", "solutions_by_problem", "solutions_by_id", "roadmaps", "_roadmaps_lower"
+    )
+
+    def __init__(
+        self,
+        index: CatalogIndex,
+        solutions_by_problem: Dict[int, Tuple[SolutionRecord, ...]],
+        roadmaps: Dict[str, RoadmapRecord]
+    ):
+        self.version = index.version
+        self.index = index
+        self.problem_ids = [entry.problem_id for entry in index.entries]
+        self.solutions_by_problem = solutions_by_problem
+        self.solutions_by_id = {
+            solution.id: solution
+            for solutions in solutions_by_problem.values()
+            for solution in solutions
+        }
+        self.roadmaps = roadmaps
+        self._roadmaps_lower = {}
+        for name, roadmap in roadmaps.items():
+            self._roadmaps_lower.setdefault(name.lower(), roadmap)
+
+    @classmethod
+    def load(cls, index: CatalogIndex) -> "CatalogSnapshot":
+        db = SessionLocal()
+        try:
+            solutions = defaultdict(list)
+            texts = {}  # blob hash -> decoded code, so shared blobs share one str
+            for row in db.query(
+                Solution.id,
+                Solution.problem_id,
+                Solution.language,
+                Solution.source,
+                Solution.contributor_github,
+                Solution.contributed_at,
+                Solution.created_at,
+                Solution.code_text,
+                Solution.code_hash,
+                CodeBlob.codec,
+                CodeBlob.length,
+                CodeBlob.data
+            ).outerjoin(CodeBlob, CodeBlob.hash == Solution.code_hash).order_by(Solution.id):
+                if row.code_hash is not None:
+                    if row.code_hash not in texts:
+                        texts[row.code_hash] = decompress_code(row.codec, row.data)
+                    code = texts[row.code_hash]
+                else:
+                    code = row.code_text
+                code_length, code_hash = code_fingerprint(row.code_hash, row.length, row.code_text)
+                solutions[row.problem_id].append(SolutionRecord(
+                    id=row.id,
+                    problem_id=row.problem_id,
+                    language=row.language,
+                    code=code,
+                    source=row.source,
+                    contributor_github=row.contributor_github,
+                    contributed_at=row.contributed_at,
+                    created_at=row.created_at,
+                    code_length=code_length,
+                    code_hash=code_hash
+                ))
+
+            members = defaultdict(list)
+            for row in db.query(RoadmapProblem).order_by(RoadmapProblem.roadmap_id, RoadmapProblem.position):
+                members[row.roadmap_id].append((row.position, row.problem_id))
+
+            roadmaps = {}
+            for roadmap in db.query(Roadmap).order_by(Roadmap.id):
+                positions, problem_ids = zip(*members[roadmap.id]) if members[roadmap.id] else ((), ())
+                roadmaps[roadmap.name] = RoadmapRecord(
+                    name=roadmap.name,
+                    display_name=roadmap.display_name,
+                    description=roadmap.description,
+                    category=roadmap.category,
+                    total_problems=roadmap.total_problems,
+                    problem_ids=problem_ids,
+                    positions=positions,
+                    difficulty_distribution=roadmap.difficulty_distribution
+                )
+        finally:
+            db.close()
+
+        return cls(
+            index,
+            {problem_id: tuple(rows) for problem_id, rows in solutions.items()},
+            roadmaps
+        )
+
+    def problem(self, problem_id: int) -> Optional[ProblemEntry]:
+        return self.index.by_problem_id.get(problem_id)
+
+    def solutions(self, problem_id: int, language: Optional[str] = None) -> Tuple[SolutionRecord, ...]:
+        solutions = self.solutions_by_problem.get(problem_id, ())
+        if language:
+            language = language.lower()
+            return tuple(s for s in solutions if s.language.lower() == language)
+        return solutions
+
+    def solution(self, solution_id: int) -> Optional[SolutionRecord]:
+        return self.solutions_by_id.get(solution_id)
+
+    def problem_page(
+        self,
+        difficulty: Optional[str],
+        topic: Optional[str],
+        company: Optional[str],
+        cursor: Optional[str],
+        skip: int,
+        limit: int
+    ) -> Tuple[List[ProblemEntry], Optional[str]]:
+        """Filtered, problem_id-ordered page with the same cursor semantics as the SQL path"""
+        bits = self.index.match(
+            difficulties=[difficulty] if difficulty else None,
+            topics=[topic] if topic else None,
+            companies=[company] if company else None
+        )
+        if cursor:
+            start = bisect_right(self.problem_ids, decode_cursor(cursor))
+            bits = bits >> start << start
+            skip = 0
+        entries = self.index.select(bits, skip=skip, limit=limit + 1)
+        if len(entries) > limit:
+            entries = entries[:limit]
+            return entries, encode_cursor(entries[-1].problem_id)
+        return entries, None
+
+    def roadmap(self, name: str) -> Optional[RoadmapRecord]:
+        """Roadmap by name, falling back to a case-insensitive match (as roadmap_id_by_name)"""
+        return self.roadmaps.get(name) or self._roadmaps_lower.get(name.lower())
+
+    def roadmap_page(
+        self,
+        roadmap: RoadmapRecord,
+        difficulty: Optional[str],
+        cursor: Optional[str],
+        limit: Optional[int]
+    ) -> Tuple[List[ProblemEntry], Optional[str]]:
+        """Roadmap problems in sheet order with the same cursor semantics as paginate_by_position"""
+        start = bisect_right(roadmap.positions, decode_cursor(cursor, "pos")) if cursor else 0
+        page = []
+        for position, problem_id in zip(roadmap.positions[start:], roadmap.problem_ids[start:]):
+            entry = self.index.by_problem_id.get(problem_id)
+            if entry is None or (difficulty and entry.difficulty != difficulty):
+                continue
+            page.append((position, entry))
+            if limit is not None and len(page) > limit:
+                page = page[:limit]
+                return [entry for _, entry in page], encode_cursor(page[-1][0], "pos")
+        return [entry for _, entry in page], None
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+_lock = threading.Lock()
+# Counters are bumped from many threadpool threads; a separate lock so a hit
+# never waits behind a snapshot reload holding _lock
+_stats_lock = threading.Lock()
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "reloads": 0,
+    "last_load_seconds": None,
+    "loaded_at": None
+}
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+# Snapshot resolved ahead of an async handler, like catalog_index's pinned index
+_pinned: ContextVar[Optional[CatalogSnapshot]] = ContextVar("pinned_catalog_snapshot", default=None)
+
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """Current snapshot, (re)loading it if the catalog version moved"""
+    global _snapshot
+    pinned = _pinned.get()
+    if pinned is not None:
+        _count("hits")
+        return pinned
+    index = get_catalog_index()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.index is index:
+        _count("hits")
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None and _snapshot.index is index:
+            _count("hits")
+            return _snapshot
+
+        _count("misses")
+        started = time.perf_counter()
+        fresh = CatalogSnapshot.load(index)
+        if _snapshot is not None:
+            _count("reloads")
+        _snapshot = fresh
+        with _stats_lock:
+            _stats["last_load_seconds"] = round(time.perf_counter() - started, 4)
+            _stats["loaded_at"] = datetime.now().isoformat()
+        logger.info(
+            "Catalog snapshot loaded: %d problems, %d roadmaps (version %s)",
+            len(fresh.problem_ids), len(fresh.roadmaps), fresh.version
+        )
+        return fresh
+
+
+def fresh_catalog() -> Optional[Tuple[CatalogIndex, Optional[CatalogSnapshot]]]:
+    """(index, snapshot or None when the cache is off) if both are current without a database read, else None"""
+    index = fresh_catalog_index()
+    if index is None:
+        return None
+    if not CATALOG_CACHE_ENABLED:
+        return index, None
+    snapshot = _snapshot
+    return (index, snapshot) if snapshot is not None and snapshot.index is index else None
+
+
+def load_catalog() -> Tuple[CatalogIndex, Optional[CatalogSnapshot]]:
+    """Like fresh_catalog, checking the version and (re)loading as needed: run it in the threadpool"""
+    if not CATALOG_CACHE_ENABLED:
+        return get_catalog_index(), None
+    snapshot = get_catalog_snapshot()
+    return snapshot.index, snapshot
+
+
+@contextmanager
+def catalog_pinned(index: CatalogIndex, snapshot: Optional[CatalogSnapshot]):
+    """get_catalog_index/get_catalog_snapshot return these in the current context"""
+    with catalog_index_pinned(index):
+        token = _pinned.set(snapshot)
+        try:
+            yield
+        finally:
+            _pinned.reset(token)
+
+
+def cache_stats() -> dict:
+    """Hit/miss/reload counters plus what the current snapshot holds"""
+    snapshot = _snapshot
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        "enabled": CATALOG_CACHE_ENABLED,
+        "version": snapshot.version if snapshot else None,
+        "problems": len(snapshot.problem_ids) if snapshot else 0,
+        "solutions": sum(len(s) for s in snapshot.solutions_by_problem.values()) if snapshot else 0,
+        "roadmaps": len(snapshot.roadmaps) if snapshot else 0,
+        **stats
+    }
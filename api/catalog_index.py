@@ -0,0 +1,367 @@
+"""
+In-process catalog index
+Resolves slugs and frontend ids to problems and evaluates facet filters
+(topics/companies/difficulties) without querying Postgres per request.
+The index is rebuilt whenever database_metadata.last_sync changes.
+
+Facet membership is kept as bitsets: problem N in problem_id order is bit N of
+a Python int, so AND/OR across facets is a handful of big-int operations.
+Title search uses a trigram inverted index over title and slug words.
+"""
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+
+from database import SessionLocal, engine
+from models import Problem, Topic, Company, problem_topics, problem_companies
+
+logger = logging.getLogger(__name__)
+
+# Seconds between catalog version checks against database_metadata
+CATALOG_VERSION_TTL = float(os.getenv("CATALOG_VERSION_TTL", "5"))
+
+# Minimum share of query trigrams a title must contain to be returned
+TITLE_SEARCH_MIN_SCORE = 0.3
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+class ProblemEntry(NamedTuple):
+    problem_id: int
+    frontend_id: Optional[int]
+    title: str
+    title_slug: str
+    difficulty: str
+    acceptance_rate: Optional[float]
+    is_premium: bool
+    problem_url: Optional[str]
+    topics: Tuple[str, ...] = ()
+    companies: Tuple[str, ...] = ()
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    def as_summary(self) -> dict:
+        return {
+            "problem_id": self.problem_id,
+            "title": self.title,
+            "title_slug": self.title_slug,
+            "difficulty": self.difficulty,
+            "acceptance_rate": self.acceptance_rate,
+            "topics": list(self.topics),
+            "companies": list(self.companies)
+        }
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase and collapse everything but letters/digits to single spaces"""
+    return _NON_ALNUM.sub(" ", value.lower()).strip()
+
+
+def trigrams(value: str) -> set:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space"""
+    grams = set()
+    for word in normalize_text(value).split():
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def read_catalog_version() -> str:
+    """Read the catalog version (last_sync) straight from database_metadata"""
+    with engine.connect() as conn:
+        try:
+            row = conn.execute(
+                text("SELECT value FROM database_metadata WHERE key = 'last_sync'")
+            ).first()
+            if row:
+                return row[0]
+        except Exception:
+            # Schema created without init.sql (no metadata table)
+            conn.rollback()
+        row = conn.execute(
+            text("SELECT COUNT(*), MAX(updated_at) FROM problems")
+        ).first()
+        return f"{row[0]}:{row[1]}"
+
+
+def _bitset(ordinals: List[int], size: int) -> int:
+    """Pack ordinals into an int bitset in one pass"""
+    buf = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        buf[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(buf, "little")
+
+
+class CatalogIndex:
+    """Immutable lookup tables over the problems catalog"""
+
+    __slots__ = (
+        "version", "entries", "by_problem_id", "by_slug", "by_frontend_id",
+        "all_bits", "topic_bits", "company_bits", "difficulty_bits",
+        "search_text", "trigram_postings"
+    )
+
+    def __init__(self, version: str, entries: List[ProblemEntry]):
+        self.version = version
+        self.entries = entries
+        self.by_problem_id: Dict[int, ProblemEntry] = {e.problem_id: e for e in entries}
+        self.by_slug: Dict[str, ProblemEntry] = {e.title_slug: e for e in entries}
+        self.by_frontend_id: Dict[int, ProblemEntry] = {
+            e.frontend_id: e for e in entries if e.frontend_id is not None
+        }
+
+        topic_ordinals = defaultdict(list)
+        company_ordinals = defaultdict(list)
+        difficulty_ordinals = defaultdict(list)
+        for ordinal, entry in enumerate(entries):
+            difficulty_ordinals[entry.difficulty].append(ordinal)
+            for name in entry.topics:
+                topic_ordinals[name].append(ordinal)
+            for name in entry.companies:
+                company_ordinals[name].append(ordinal)
+
+        size = len(entries)
+        self.all_bits = (1 << size) - 1
+        self.topic_bits = {k: _bitset(v, size) for k, v in topic_ordinals.items()}
+        self.company_bits = {k: _bitset(v, size) for k, v in company_ordinals.items()}
+        self.difficulty_bits = {k: _bitset(v, size) for k, v in difficulty_ordinals.items()}
+
+        # Title/slug trigram index: trigram -> ordinals (array of unsigned ints)
+        self.search_text: List[str] = []
+        postings = defaultdict(list)
+        for ordinal, entry in enumerate(entries):
+            text_value = normalize_text(f"{entry.title} {entry.title_slug.replace('-', ' ')}")
+            self.search_text.append(text_value)
+            for gram in trigrams(text_value):
+                postings[gram].append(ordinal)
+        self.trigram_postings: Dict[str, array] = {k: array("I", v) for k, v in postings.items()}
+
+    @staticmethod
+    def _combine(bitsets: Dict[str, int], names: Iterable[str], match: str) -> int:
+        """AND (match="all") or OR (match="any") the bitsets for names"""
+        result = None
+        for name in names:
+            bits = bitsets.get(name, 0)
+            if result is None:
+                result = bits
+            elif match == "all":
+                result &= bits
+            else:
+                result |= bits
+        return result or 0
+
+    def match(
+        self,
+        difficulties: Optional[List[str]] = None,
+        topics: Optional[List[str]] = None,
+        companies: Optional[List[str]] = None,
+        topic_match: str = "any",
+        company_match: str = "any"
+    ) -> int:
+        """Bitset of problems matching every given facet"""
+        bits = self.all_bits
+        if difficulties:
+            bits &= self._combine(self.difficulty_bits, (d.capitalize() for d in difficulties), "any")
+        if topics:
+            bits &= self._combine(self.topic_bits, topics, topic_match)
+        if companies:
+            bits &= self._combine(self.company_bits, companies, company_match)
+        return bits
+
+    def facet_counts(self, bits: int) -> Dict[str, Dict[str, int]]:
+        """Per-topic/company/difficulty counts of the problems in bits (zero counts omitted)"""
+        counts = {}
+        for facet, bitsets in (
+            ("topics", self.topic_bits),
+            ("companies", self.company_bits),
+            ("difficulties", self.difficulty_bits)
+        ):
+            facet_counts = {}
+            for name, facet_bits in bitsets.items():
+                count = (bits & facet_bits).bit_count()
+                if count:
+                    facet_counts[name] = count
+            counts[facet] = facet_counts
+        return counts
+
+    def search_titles(self, query: str, limit: int = 20) -> List[Tuple[ProblemEntry, float]]:
+        """
+        Typo-tolerant title search ranked by trigram overlap
+        Exact frontend id matches rank first, then substring/prefix hits get a boost.
+        """
+        results = {}
+        stripped = query.strip().lstrip("#")
+        if stripped.isdigit():
+            entry = self.by_frontend_id.get(int(stripped))
+            if entry is not None:
+                results[entry.problem_id] = (entry, 3.0)
+
+        normalized = normalize_text(query)
+        grams = trigrams(normalized)
+        if grams:
+            counts = Counter()
+            for gram in grams:
+                posting = self.trigram_postings.get(gram)
+                if posting is not None:
+                    counts.update(posting)
+
+            # Rerank only the best raw overlaps; most_common runs in C
+            min_hits = max(1, int(len(grams) * TITLE_SEARCH_MIN_SCORE + 0.999))
+            for ordinal, hits in counts.most_common(max(limit * 10, 200)):
+                if hits < min_hits:
+                    break
+                score = hits / len(grams)
+                text_value = self.search_text[ordinal]
+                if text_value.startswith(normalized):
+                    score += 1.0
+                elif normalized in text_value:
+                    score += 0.5
+                entry = self.entries[ordinal]
+                if entry.problem_id not in results:
+                    results[entry.problem_id] = (entry, score)
+
+        return heapq.nlargest(
+            limit,
+            results.values(),
+            key=lambda hit: (hit[1], -hit[0].problem_id)
+        )
+
+    def select(self, bits: int, skip: int = 0, limit: Optional[int] = None) -> List[ProblemEntry]:
+        """Entries for the set bits, in problem_id order"""
+        result = []
+        while bits and (limit is None or len(result) < limit):
+            lowest = bits & -bits
+            bits ^= lowest
+            if skip:
+                skip -= 1
+                continue
+            result.append(self.entries[lowest.bit_length() - 1])
+        return result
+
+    @classmethod
+    def load(cls, version: str) -> "CatalogIndex":
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                Problem.problem_id,
+                Problem.frontend_id,
+                Problem.title,
+                Problem.title_slug,
+                Problem.difficulty,
+                Problem.acceptance_rate,
+                Problem.is_premium,
+                Problem.problem_url,
+                Problem.id,
+                Problem.created_at
+            ).order_by(Problem.problem_id).all()
+
+            topics_of = defaultdict(list)
+            for problem_id, name in db.query(problem_topics.c.problem_id, Topic.name).join(
+                Topic, Topic.id == problem_topics.c.topic_id
+            ).order_by(Topic.name):
+                topics_of[problem_id].append(name)
+
+            companies_of = defaultdict(list)
+            for problem_id, name in db.query(problem_companies.c.problem_id, Company.name).join(
+                Company, Company.id == problem_companies.c.company_id
+            ).order_by(Company.name):
+                companies_of[problem_id].append(name)
+        finally:
+            db.close()
+
+        entries = [
+            ProblemEntry(
+                problem_id=row.problem_id,
+                frontend_id=row.frontend_id,
+                title=row.title,
+                title_slug=row.title_slug,
+                difficulty=row.difficulty,
+                acceptance_rate=float(row.acceptance_rate) if row.acceptance_rate is not None else None,
+                is_premium=bool(row.is_premium),
+                problem_url=row.problem_url,
+                topics=tuple(topics_of.get(row.problem_id, ())),
+                companies=tuple(companies_of.get(row.problem_id, ())),
+                id=row.id,
+                created_at=row.created_at
+            )
+            for row in rows
+        ]
+        return cls(version, entries)
+
+
+_index: Optional[CatalogIndex] = None
+_version: Optional[str] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+# Index resolved ahead of an async handler (see async_db.db_route): the body runs
+# on the event loop, where the version check and rebuild must not hit the database
+_pinned: ContextVar[Optional[CatalogIndex]] = ContextVar("pinned_catalog_index", default=None)
+
+
+@contextmanager
+def catalog_index_pinned(index: CatalogIndex):
+    """Serve this index (and its version) to the current context without checking the database"""
+    token = _pinned.set(index)
+    try:
+        yield index
+    finally:
+        _pinned.reset(token)
+
+
+def fresh_catalog_index() -> Optional[CatalogIndex]:
+    """The current index if returning it needs no database read (version checked within the TTL), else None"""
+    index = _index
+    if _version is None or time.monotonic() - _checked_at >= CATALOG_VERSION_TTL:
+        return None
+    return index if index is not None and index.version == _version else None
+
+
+def current_catalog_version() -> str:
+    """Catalog version, re-read from the database at most every CATALOG_VERSION_TTL seconds"""
+    global _version, _checked_at
+    pinned = _pinned.get()
+    if pinned is not None:
+        return pinned.version
+    if _version is not None and time.monotonic() - _checked_at < CATALOG_VERSION_TTL:
+        return _version
+    with _lock:
+        if _version is None or time.monotonic() - _checked_at >= CATALOG_VERSION_TTL:
+            _version = read_catalog_version()
+            _checked_at = time.monotonic()
+        return _version
+
+
+def get_catalog_index() -> CatalogIndex:
+    """Return the current index, rebuilding it if the catalog version moved"""
+    global _index
+    pinned = _pinned.get()
+    if pinned is not None:
+        return pinned
+    version = current_catalog_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = CatalogIndex.load(version)
+            logger.info("Catalog index built: %d problems (version %s)", len(_index.entries), version)
+        return _index
+
+
+def refresh_catalog_index() -> CatalogIndex:
+    """Force a version check and rebuild if needed (used at startup)"""
+    global _checked_at
+    _checked_at = 0.0
+    return get_catalog_index()
@@ -0,0 +1,132 @@
+"""
+Content-addressed storage for solution code
+Code is hashed with SHA-256 and stored once, compressed, in code_blobs. It is
+stored exactly as submitted (whitespace and line endings included), so reads
+return the saved text byte for byte; only identical submissions share a blob. solutions, pending_contributions and
+user_progress reference blobs by hash, so the same submission saved to
+progress, contributed and merged occupies a single row.
+"""
+import hashlib
+import os
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+# Codec for new blobs: "zlib" (stdlib) or "zstd" (needs the zstandard package)
+CODE_BLOB_CODEC = os.getenv("CODE_BLOB_CODEC", "zlib")
+
+
+def hash_code(code: str) -> str:
+    """Blob key: hex SHA-256 of the code"""
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def code_fingerprint(code_hash: Optional[str], length: Optional[int], inline_code: Optional[str]) -> Tuple[int, str]:
+    """(length, hash) of a row's code, whether it is in a blob or still inline"""
+    if code_hash is not None:
+        return length, code_hash
+    text = inline_code or ""
+    return len(text), hash_code(text)
+
+
+def compress_code(text: str) -> Tuple[str, bytes]:
+    """Return (codec, data); falls back to "none" when compression doesn't help"""
+    raw = text.encode("utf-8")
+    if CODE_BLOB_CODEC == "zstd" and zstandard is not None:
+        codec, data = "zstd", zstandard.ZstdCompressor(level=9).compress(raw)
+    else:
+        codec, data = "zlib", zlib.compress(raw, 9)
+    if len(data) >= len(raw):
+        return "none", raw
+    return codec, data
+
+
+def decompress_code(codec: str, data: bytes) -> str:
+    if codec == "zlib":
+        raw = zlib.decompress(data)
+    elif codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard package required to read zstd code blobs")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == "none":
+        raw = data
+    else:
+        raise ValueError(f"Unknown code blob codec: {codec}")
+    return bytes(raw).decode("utf-8")
+
+
+def blob_row(code: str) -> dict:
+    """code_blobs row for code (hashed, compressed)"""
+    codec, data = compress_code(code)
+    return {
+        "hash": hash_code(code),
+        "codec": codec,
+        "length": len(code),
+        "data": data
+    }
+
+
+def put_code(db, code: Optional[str]) -> Optional[str]:
+    """Store code if not already present and return its hash (None for empty code)"""
+    if not code:
+        return None
+    return put_codes(db, [code])[0]
+
+
+def code_blobs_insert(codes: Iterable[Optional[str]]):
+    """
+    (hashes, statement): the hash of each code (None for empty code) and one
+    INSERT ... ON CONFLICT DO NOTHING storing the distinct blobs (None when there
+    are none). Execute the statement, or attach it as a CTE to the write that
+    references the hashes so both go in one round trip.
+    """
+    try:
+        from models import CodeBlob
+    except ImportError:
+        from api.models import CodeBlob
+
+    rows = {}
+    hashes = []
+    for code in codes:
+        if not code:
+            hashes.append(None)
+            continue
+        row = blob_row(code)
+        rows[row["hash"]] = row
+        hashes.append(row["hash"])
+    if not rows:
+        return hashes, None
+    statement = (
+        insert(CodeBlob.__table__)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(index_elements=["hash"])
+    )
+    return hashes, statement
+
+
+def put_codes(db, codes: Iterable[str]) -> list:
+    """Bulk put_code: one multi-row INSERT ... ON CONFLICT DO NOTHING"""
+    hashes, statement = code_blobs_insert(codes)
+    if statement is not None:
+        db.execute(statement)
+    return hashes
+
+
+def get_codes(db, hashes: Iterable[str]) -> Dict[str, str]:
+    """Fetch and decompress several blobs in one query"""
+    try:
+        from models import CodeBlob
+    except ImportError:
+        from api.models import CodeBlob
+
+    wanted = {h for h in hashes if h}
+    if not wanted:
+        return {}
+    rows = db.query(CodeBlob.hash, CodeBlob.codec, CodeBlob.data).filter(CodeBlob.hash.in_(wanted))
+    return {row.hash: decompress_code(row.codec, row.data) for row in rows}
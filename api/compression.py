@@ -0,0 +1,91 @@
+"""
+Negotiated response compression
+Picks zstd, brotli or gzip from Accept-Encoding (zstd/brotli only when their
+packages are installed) for JSON/text responses above COMPRESSION_MIN_SIZE bytes.
+Streaming responses without a Content-Length are passed through untouched.
+"""
+import gzip
+import os
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _compressors():
+    """Available codecs in server preference order"""
+    codecs = []
+    if zstandard is not None:
+        codecs.append(("zstd", lambda body: zstandard.ZstdCompressor(level=3).compress(body)))
+    if brotli is not None:
+        codecs.append(("br", lambda body: brotli.compress(body, quality=4)))
+    codecs.append(("gzip", lambda body: gzip.compress(body, compresslevel=6)))
+    return codecs
+
+
+COMPRESSORS = _compressors()
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 1.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str):
+    """Return (name, compress_fn) for the best mutually supported codec, or None"""
+    accepted = _accepted_encodings(accept_encoding or "")
+    for name, compress in COMPRESSORS:
+        if name in accepted or "*" in accepted:
+            return name, compress
+    return None
+
+
+async def compression_middleware(request: Request, call_next):
+    response = await call_next(request)
+
+    codec = choose_encoding(request.headers.get("accept-encoding"))
+    content_length = response.headers.get("content-length")
+    content_type = response.headers.get("content-type", "")
+    if (
+        codec is None
+        or content_length is None
+        or int(content_length) < COMPRESSION_MIN_SIZE
+        or "content-encoding" in response.headers
+        or not content_type.startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    name, compress = codec
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    compressed = compress(body)
+
+    headers = dict(response.headers)
+    headers["content-encoding"] = name
+    headers["content-length"] = str(len(compressed))
+    headers["vary"] = "Accept-Encoding"
+    # Same entity, different bytes: downgrade to a weak validator
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = f"W/{etag}"
+    return Response(content=compressed, status_code=response.status_code, headers=headers)
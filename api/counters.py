@@ -0,0 +1,118 @@
+"""
+Precomputed counters for /api/stats
+stat_counters rows are kept current by statement-level triggers on problems,
+solutions and pending_contributions (database/migrations/002_stat_counters.sql),
+so reading the stats is one small SELECT instead of full-table counts.
+
+Drift is only possible if triggers were bypassed (disabled triggers, restores,
+session_replication_role=replica). Recompute and fix with:
+    python counters.py [--dry-run]
+"""
+import argparse
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Problem, Solution, PendingContribution, StatCounter
+
+PROBLEMS = "problems"
+SOLUTIONS = "solutions"
+LANGUAGE_PREFIX = "solutions.language:"
+STATUS_PREFIX = "pending_contributions.status:"
+
+
+def read_counters(db: Session) -> Dict[str, int]:
+    return {name: value for name, value in db.query(StatCounter.name, StatCounter.value)}
+
+
+def counters_updated_at(db: Session) -> Optional[datetime]:
+    """When any counter last changed (None before the first count)"""
+    return db.query(func.max(StatCounter.updated_at)).scalar()
+
+
+def stats_from_counters(counters: Dict[str, int]) -> dict:
+    """The count fields of /api/stats"""
+    return {
+        "total_problems": counters.get(PROBLEMS, 0),
+        "total_solutions": counters.get(SOLUTIONS, 0),
+        "pending_contributions": counters.get(STATUS_PREFIX + "pending", 0),
+        "languages": {
+            name[len(LANGUAGE_PREFIX):]: value
+            for name, value in sorted(counters.items())
+            if name.startswith(LANGUAGE_PREFIX) and value
+        }
+    }
+
+
+def compute_counters(db: Session) -> Dict[str, int]:
+    """Count everything from the source tables (what the triggers should have produced)"""
+    counters = {
+        PROBLEMS: db.query(func.count(Problem.id)).scalar(),
+        SOLUTIONS: db.query(func.count(Solution.id)).scalar()
+    }
+    for language, count in db.query(Solution.language, func.count(Solution.id)).group_by(Solution.language):
+        counters[LANGUAGE_PREFIX + language] = count
+    for status, count in (
+        db.query(PendingContribution.status, func.count(PendingContribution.id))
+        .filter(PendingContribution.status.isnot(None))
+        .group_by(PendingContribution.status)
+    ):
+        counters[STATUS_PREFIX + status] = count
+    return counters
+
+
+def reconcile(db: Session, fix: bool = True) -> Dict[str, Tuple[int, int]]:
+    """
+    Compare stored counters with real counts; returns {name: (stored, actual)} for drifted ones
+    Writers are blocked (SHARE lock) while counting so the comparison is exact.
+    With fix=True the counters, and database_metadata's totals, are rewritten.
+    """
+    db.execute(text("LOCK TABLE problems, solutions, pending_contributions IN SHARE MODE"))
+    stored = read_counters(db)
+    actual = compute_counters(db)
+
+    drift = {
+        name: (stored.get(name, 0), actual.get(name, 0))
+        for name in stored.keys() | actual.keys()
+        if stored.get(name, 0) != actual.get(name, 0)
+    }
+
+    if fix:
+        statement = insert(StatCounter.__table__).values(
+            [{"name": name, "value": value} for name, value in sorted(actual.items())]
+        )
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"value": statement.excluded.value, "updated_at": func.now()}
+        ))
+        db.query(StatCounter).filter(StatCounter.name.notin_(actual.keys())).delete(synchronize_session=False)
+        for key, name in (("total_problems", PROBLEMS), ("total_solutions", SOLUTIONS)):
+            db.execute(
+                text("UPDATE database_metadata SET value = :val, updated_at = NOW() WHERE key = :key"),
+                {"val": str(actual[name]), "key": key}
+            )
+        db.commit()
+    else:
+        db.rollback()
+    return drift
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute /api/stats counters and fix drift")
+    parser.add_argument("--dry-run", action="store_true", help="report drift without changing anything")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drift = reconcile(db, fix=not args.dry_run)
+    finally:
+        db.close()
+
+    if not drift:
+        print("✅ Counters are in sync")
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"{'would fix' if args.dry_run else 'fixed'} {name}: {stored} -> {actual}")
@@ -0,0 +1,163 @@
+"""
+Engine tuning profile (pool sizing, connection health, statement limits)
+Every engine (primary, replicas, sync and async) is created with these options.
+
+Pool sizes are per process: with N uvicorn/gunicorn workers the database sees up
+to N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections, so size them against
+max_connections (or the PgBouncer pool) divided by WEB_CONCURRENCY.
+
+DB_PGBOUNCER=true is for PgBouncer in transaction pooling mode:
+- no startup parameters (PgBouncer rejects `options`/server_settings), so
+  statement_timeout is applied with SET LOCAL at the start of each transaction
+- asyncpg prepared statements are disabled and named uniquely, since consecutive
+  transactions may run on different server connections
+"""
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a free connection before failing with 503
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Replace connections older than this (seconds; -1 keeps them forever)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections on checkout, so a Postgres restart costs a reconnect instead of a failed request
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Per-statement limit in milliseconds (0 disables)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# asyncpg prepared statements kept per connection (0 disables); psycopg2 never prepares server-side
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "100"))
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() in ("1", "true", "yes")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# SQLSTATE query_canceled: statement_timeout (or pg_cancel_backend) fired
+STATEMENT_TIMEOUT_SQLSTATE = "57014"
+
+
+# Called as observer(pool_name, seconds, timed_out) after every checkout (metrics.py adds one)
+checkout_observers = []
+
+
+class _TimedCheckout:
+    """
+    Reports how long connect() took: waiting for a free slot, opening a new
+    connection, or giving up after pool_timeout. SQLAlchemy has events for a
+    completed checkout but none for when one starts waiting.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            for observer in checkout_observers:
+                observer(self.logging_name, time.perf_counter() - started, timed_out)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(pre_ping: bool, name: str) -> dict:
+    return {
+        # Label of this pool in the db_pool_* metrics (kept when the pool is recreated)
+        "pool_logging_name": name,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING or pre_ping
+    }
+
+
+def sync_engine_options(pre_ping: bool = False, name: str = "primary") -> dict:
+    """create_engine() keyword arguments for psycopg2"""
+    options = _pool_options(pre_ping, name)
+    options["poolclass"] = TimedQueuePool
+    if DB_STATEMENT_TIMEOUT_MS and not DB_PGBOUNCER:
+        options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def async_engine_options(pre_ping: bool = False, name: str = "primary-async") -> dict:
+    """create_async_engine() keyword arguments for asyncpg"""
+    options = _pool_options(pre_ping, name)
+    options["poolclass"] = TimedAsyncQueuePool
+    connect_args = {"prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE}
+    if DB_PGBOUNCER:
+        connect_args.update(
+            prepared_statement_cache_size=0,
+            statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__"
+        )
+    elif DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    options["connect_args"] = connect_args
+    return options
+
+
+def apply_engine_profile(engine):
+    """Per-transaction settings that can't be startup parameters (PgBouncer mode)"""
+    if DB_PGBOUNCER and DB_STATEMENT_TIMEOUT_MS:
+        @event.listens_for(engine, "begin")
+        def _set_statement_timeout(connection):
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+    return engine
+
+
+def is_statement_timeout(error) -> bool:
+    """Whether a DBAPIError is Postgres cancelling a statement"""
+    return getattr(getattr(error, "orig", None), "pgcode", None) == STATEMENT_TIMEOUT_SQLSTATE
+
+
+def is_overload(error: Exception) -> bool:
+    """
+    Pool exhausted or statement_timeout fired. main.py answers these with 503 +
+    Retry-After, so handlers that turn other errors into 500s must re-raise them.
+    """
+    return isinstance(error, PoolTimeoutError) or (isinstance(error, DBAPIError) and is_statement_timeout(error))
+
+
+def engine_settings_report(db_mode: str, replica_count: int) -> dict:
+    """Effective engine settings (logged at start-up)"""
+    per_worker = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    # Async mode keeps the sync engine for catalog loads/exports next to the asyncpg one
+    engines_per_worker = 2 if db_mode == "async" else 1
+    return {
+        "db_mode": db_mode,
+        "replicas": replica_count,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout_s": DB_POOL_TIMEOUT,
+        "pool_recycle_s": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS or None,
+        "prepared_statement_cache_size": (
+            (0 if DB_PGBOUNCER else DB_PREPARED_STATEMENT_CACHE_SIZE) if db_mode == "async" else None
+        ),
+        "pgbouncer": DB_PGBOUNCER,
+        "workers": WEB_CONCURRENCY,
+        # Upper bound on connections this deployment opens to the primary
+        "max_primary_connections": WEB_CONCURRENCY * engines_per_worker * per_worker
+    }
+
+
+def log_engine_settings(report: dict):
+    # uvicorn's logger is the one configured to print INFO during start-up
+    logging.getLogger("uvicorn.error").info(
+        "Database engine: %s", ", ".join(f"{key}={value}" for key, value in report.items())
+    )
@@ -5,6 +5,8 @@ from typing import Dict, Any
 import os
 from datetime import datetime
 
+from metrics import GITHUB_EVENT_HOOKS, observe_github_call
+
 
 class GitHubService:
     def __init__(self, client_id: str, client_secret: str, repo_owner: str, repo_name: str):
@@ -16,6 +18,7 @@ class GitHubService:
         # Optional: Only needed for backend PR creation (users create PRs via extension)
         self.github_token = os.getenv("GITHUB_ACCESS_TOKEN")
     
+    @observe_github_call("create_contribution_pr")
     async def create_contribution_pr(
         self,
         problem_id: int,
@@ -34,7 +37,7 @@ class GitHubService:
             raise Exception("GitHub access token not configured. Set GITHUB_ACCESS_TOKEN in .env")
         
         try:
-            async with httpx.AsyncClient() as client:
+            async with httpx.AsyncClient(event_hooks=GITHUB_EVENT_HOOKS) as client:
                 # 1. Get main branch SHA
                 branch_response = await client.get(
                     f"{self.api_base}/repos/{self.repo_owner}/{self.repo_name}/git/refs/heads/main",
@@ -183,9 +186,10 @@ class GitHubService:
 """
         return body
     
+    @observe_github_call("get_user_info")
     async def get_user_info(self, access_token: str) -> Dict[str, Any]:
         """Get GitHub user information"""
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(event_hooks=GITHUB_EVENT_HOOKS) as client:
             response = await client.get(
                 f"{self.api_base}/user",
                 headers={
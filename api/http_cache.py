@@ -0,0 +1,101 @@
+"""
+HTTP conditional caching for catalog endpoints
+Catalog responses get strong ETags derived from the catalog version, so a
+matching If-None-Match is answered with 304 before any handler (or ORM query) runs.
+/api/stats mixes in live contribution counts, so its ETag is taken from the body.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from catalog_index import current_catalog_version
+
+# Seconds clients/CDNs may reuse a catalog response without revalidating
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "300"))
+STATS_CACHE_MAX_AGE = int(os.getenv("STATS_CACHE_MAX_AGE", "30"))
+
+
+def is_catalog_request(request: Request) -> bool:
+    """GET requests whose response depends only on the catalog version"""
+    if request.method != "GET" or "user_id" in request.query_params:
+        return False
+    path = request.url.path
+    return (
+        path.startswith("/api/problems")
+        or path.startswith("/api/solutions/")
+        or path == "/api/roadmaps/"
+        or (path.startswith("/api/roadmaps/") and path.endswith("/problems"))
+    )
+
+
+def catalog_etag(request: Request, version: str) -> str:
+    """Strong ETag over catalog version + normalized path and query"""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.sha256(f"{version}|{request.url.path}|{query}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Weak comparison, as If-None-Match requires (compressed bodies carry W/ tags).
+    Returns the tag as the client sent it, or None when nothing matches.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.removeprefix("W/") == etag:
+            return tag
+    return None
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    """
+    304 with the validator the matching 200 carried: the client's own form of
+    the tag, since compression_middleware weakens it (W/) on encoded 200s but
+    never sees the body-less 304
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag.startswith("W/"):
+        headers["Vary"] = "Accept-Encoding"
+    return Response(status_code=304, headers=headers)
+
+
+async def conditional_cache_middleware(request: Request, call_next):
+    """Answer If-None-Match with 304 and tag cacheable responses with ETag/Cache-Control"""
+    if is_catalog_request(request):
+        cache_control = f"public, max-age={CATALOG_CACHE_MAX_AGE}"
+        version = await run_in_threadpool(current_catalog_version)
+        etag = catalog_etag(request, version)
+        matched = matching_etag(request.headers.get("if-none-match"), etag)
+        if matched:
+            return _not_modified(matched, cache_control)
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = cache_control
+        return response
+
+    if request.method == "GET" and request.url.path == "/api/stats":
+        cache_control = f"public, max-age={STATS_CACHE_MAX_AGE}"
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        matched = matching_etag(request.headers.get("if-none-match"), etag)
+        if matched:
+            return _not_modified(matched, cache_control)
+        headers = dict(response.headers)
+        headers["ETag"] = etag
+        headers["Cache-Control"] = cache_control
+        return Response(content=body, status_code=200, headers=headers)
+
+    return await call_next(request)
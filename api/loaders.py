@@ -0,0 +1,42 @@
+"""
+Relationship loading strategies for catalog queries
+Every handler that returns problems goes through these helpers so the number of
+SQL statements per request stays constant regardless of page size.
+"""
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Query, selectinload
+
+from models import Problem, Solution, Topic, Company, problem_topics, problem_companies
+
+
+def with_problem_relations(query: Query, solutions: bool = True) -> Query:
+    """Batch-load topics, companies (and optionally solutions) with one SELECT ... IN each"""
+    options = [
+        selectinload(Problem.topics),
+        selectinload(Problem.companies)
+    ]
+    if solutions:
+        options.append(selectinload(Problem.solutions).selectinload(Solution.blob))
+    return query.options(*options)
+
+
+def _names_subquery(entity, association, foreign_key):
+    """Correlated array_agg of topic/company names (alphabetical) for the outer Problem row"""
+    return (
+        select(func.array_agg(aggregate_order_by(entity.name, entity.name)))
+        .select_from(association.join(entity, entity.id == foreign_key))
+        .where(association.c.problem_id == Problem.problem_id)
+        .correlate(Problem)
+        .scalar_subquery()
+    )
+
+
+def topic_names_column():
+    """Column expression yielding the problem's topic names (NULL if none)"""
+    return _names_subquery(Topic, problem_topics, problem_topics.c.topic_id).label("topics")
+
+
+def company_names_column():
+    """Column expression yielding the problem's company names (NULL if none)"""
+    return _names_subquery(Company, problem_companies, problem_companies.c.company_id).label("companies")
@@ -1,23 +1,59 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import os
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
 from datetime import datetime
+import logging
+import os
 
-from database import get_db, engine
-from models import Problem, Solution, PendingContribution, Topic, Company
+from database import DB_MODE, get_db, get_read_db, engine, async_engine, replicas, async_replicas
+from engine_profile import DB_POOL_TIMEOUT, engine_settings_report, is_overload, is_statement_timeout, log_engine_settings
+from async_db import db_route, get_session, run_db
+from models import Problem, Solution, PendingContribution, Topic, Company, CodeBlob
+from catalog_index import get_catalog_index, refresh_catalog_index
+from catalog_cache import CATALOG_CACHE_ENABLED, get_catalog_snapshot, cache_stats
+from http_cache import conditional_cache_middleware
+from compression import compression_middleware
+from code_store import code_fingerprint, put_code
+from counters import counters_updated_at, read_counters, stats_from_counters
+from read_your_writes import LAST_WRITE_HEADER, read_your_writes_middleware
+from query_stats import DEBUG, instrument_engine, query_stats_middleware, query_stats_report
+from metrics import GITHUB_EVENT_HOOKS, instrument_pool, metrics_middleware, metrics_response, mark_worker_dead
+from serialization import (
+    fast_json,
+    problem_to_dict,
+    problem_entry_to_dict,
+    solution_to_dict,
+    solution_meta_to_dict,
+    summary_row_to_dict
+)
+from loaders import with_problem_relations, topic_names_column, company_names_column
+from pagination import NEXT_CURSOR_HEADER, paginate_by_problem_id
 from schemas import (
+    ProblemBase,
     ProblemResponse, 
+    ProblemSummary,
+    ProblemFields,
     SolutionResponse, 
+    SolutionMeta,
+    SolutionFields,
     ContributionRequest,
     ContributionResponse,
-    FilterRequest
+    FilterRequest,
+    ProblemSearchResponse,
+    TitleSearchResponse
 )
 from github_service import GitHubService
 from routers.roadmaps import router as roadmaps_router
 from routers.ai_settings import router as ai_settings_router
-from routers.progress import router as progress_router
+from routers.progress import router as progress_router, progress_buffer
+from routers.export import router as export_router
+
+logger = logging.getLogger(__name__)
 
 # Initialize FastAPI
 app = FastAPI(
@@ -33,12 +69,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, LAST_WRITE_HEADER, "ETag", "Server-Timing"],
 )
 
+# ETag / If-None-Match handling for catalog endpoints
+app.middleware("http")(conditional_cache_middleware)
+
+# gzip/brotli/zstd for large JSON bodies
+app.middleware("http")(compression_middleware)
+
+# Last-write token so a client's reads after its own writes skip the replicas
+app.middleware("http")(read_your_writes_middleware)
+
+# Per-request SQL counts/timing
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+for replica in replicas.engines:
+    instrument_engine(replica)
+for replica in async_replicas.engines:
+    instrument_engine(replica.sync_engine)
+app.middleware("http")(query_stats_middleware)
+
+# Prometheus latency histograms / pool gauges (outermost: times the whole stack)
+for pooled in [engine, async_engine, *replicas.engines, *async_replicas.engines]:
+    if pooled is not None:
+        instrument_pool(pooled)
+app.middleware("http")(metrics_middleware)
+
 # Register routers
 app.include_router(roadmaps_router)
 app.include_router(ai_settings_router)
 app.include_router(progress_router)
+app.include_router(export_router)
 
 # GitHub service
 github_service = GitHubService(
@@ -49,6 +112,62 @@ github_service = GitHubService(
 )
 
 
+@app.exception_handler(PoolTimeoutError)
+async def pool_exhausted(request: Request, exc: PoolTimeoutError):
+    """Every pooled connection stayed busy for DB_POOL_TIMEOUT: shed load instead of a 500"""
+    logger.warning("Connection pool exhausted on %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database busy, retry shortly"},
+        headers={"Retry-After": str(max(1, round(DB_POOL_TIMEOUT / 10)))}
+    )
+
+
+@app.exception_handler(DBAPIError)
+async def statement_timed_out(request: Request, exc: DBAPIError):
+    """DB_STATEMENT_TIMEOUT_MS cancelled the query; other database errors stay 500s"""
+    if not is_statement_timeout(exc):
+        raise exc
+    logger.warning("Statement timeout on %s %s", request.method, request.url.path)
+    return JSONResponse(status_code=503, content={"detail": "Database query timed out"})
+
+
+@app.on_event("startup")
+def report_engine_settings():
+    log_engine_settings(engine_settings_report(DB_MODE, len(replicas.engines)))
+
+
+@app.on_event("startup")
+def warm_catalog_index():
+    """Build the catalog index (and cache snapshot) before the first request"""
+    try:
+        refresh_catalog_index()
+        if CATALOG_CACHE_ENABLED:
+            get_catalog_snapshot()
+    except Exception as e:
+        # Index is built lazily on first lookup if the database isn't ready yet
+        logger.warning("Catalog index not built at startup: %s", e)
+
+
+@app.on_event("startup")
+def start_progress_buffer():
+    """Write-behind flusher (replays saves journaled by workers that died)"""
+    if progress_buffer is not None:
+        progress_buffer.start()
+
+
+@app.on_event("shutdown")
+async def release_resources():
+    if progress_buffer is not None:
+        # Last flush before the pools go away
+        await run_in_threadpool(progress_buffer.close)
+    mark_worker_dead()
+    if async_engine is not None:
+        await async_engine.dispose()
+    for replica in async_replicas.engines:
+        await replica.dispose()
+
+
 @app.get("/")
 def root():
     return {
@@ -56,24 +175,61 @@ def root():
         "version": "1.0.0",
         "endpoints": {
             "problems": "/api/problems",
+            "problem_by_slug": "/api/problems/by-slug/{slug}",
             "solutions": "/api/solutions/{problem_id}",
             "contribute": "/api/contribute",
-            "stats": "/api/stats"
+            "stats": "/api/stats",
+            "export": "/api/export/catalog.ndjson",
+            "cache_stats": "/api/cache/stats",
+            "query_stats": "/api/debug/queries",
+            "metrics": "/metrics"
         }
     }
 
 
-@app.get("/api/problems", response_model=List[ProblemResponse])
+@app.get("/api/problems", response_model=Union[List[ProblemResponse], List[ProblemSummary]])
+@db_route
 def get_problems(
+    response: Response,
     difficulty: Optional[str] = None,
     topic: Optional[str] = None,
     company: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: ProblemFields = "full",
+    db: Session = Depends(get_read_db)
 ):
-    """Get problems with optional filters"""
-    query = db.query(Problem)
+    """
+    Get problems with optional filters, ordered by problem_id
+    fields=summary returns lean rows (no solutions) built from a single column-only query.
+    Pass the X-Next-Cursor response header back as ?cursor= to fetch the next page
+    (keyset pagination; skip is ignored when a cursor is given).
+    """
+    if CATALOG_CACHE_ENABLED:
+        snapshot = get_catalog_snapshot()
+        entries, next_cursor = snapshot.problem_page(difficulty, topic, company, cursor, skip, limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        if fields == "summary":
+            return fast_json([entry.as_summary() for entry in entries], response)
+        return fast_json(
+            [problem_entry_to_dict(entry, snapshot.solutions(entry.problem_id)) for entry in entries],
+            response
+        )
+    
+    if fields == "summary":
+        query = db.query(
+            Problem.problem_id,
+            Problem.title,
+            Problem.title_slug,
+            Problem.difficulty,
+            Problem.acceptance_rate,
+            topic_names_column(),
+            company_names_column()
+        )
+    else:
+        query = with_problem_relations(db.query(Problem))
     
     if difficulty:
         query = query.filter(Problem.difficulty == difficulty.capitalize())
@@ -84,35 +240,151 @@ def get_problems(
     if company:
         query = query.join(Problem.companies).filter(Company.name == company)
     
-    problems = query.offset(skip).limit(limit).all()
-    return problems
+    problems, next_cursor = paginate_by_problem_id(query, Problem.problem_id, cursor, limit, skip)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    if fields == "summary":
+        return fast_json([summary_row_to_dict(row) for row in problems], response)
+    return fast_json([problem_to_dict(problem) for problem in problems], response)
+
+
+@app.post("/api/problems/search", response_model=ProblemSearchResponse)
+def search_problems(filters: FilterRequest):
+    """
+    Multi-facet problem search evaluated against in-memory bitset indexes
+    Facets are ANDed together; values within a facet combine per topic_match/company_match.
+    include_facets=true adds per-topic/company/difficulty counts for the matching set.
+    """
+    index = get_catalog_index()
+    difficulties = filters.difficulties or ([filters.difficulty] if filters.difficulty else None)
+    bits = index.match(
+        difficulties=difficulties,
+        topics=filters.topics,
+        companies=filters.companies,
+        topic_match=filters.topic_match,
+        company_match=filters.company_match
+    )
+    entries = index.select(bits, skip=filters.skip, limit=filters.limit)
+    return ProblemSearchResponse(
+        total=bits.bit_count(),
+        results=[e.as_summary() for e in entries],
+        facets=index.facet_counts(bits) if filters.include_facets else None
+    )
+
+
+@app.get("/api/problems/search", response_model=TitleSearchResponse)
+def search_problem_titles(q: str, limit: int = 20):
+    """Fuzzy search over problem titles, slugs and frontend ids (in-memory trigram index)"""
+    hits = get_catalog_index().search_titles(q, limit=min(limit, 100))
+    return TitleSearchResponse(
+        query=q,
+        results=[{**entry.as_summary(), "score": round(score, 4)} for entry, score in hits]
+    )
+
+
+@app.get("/api/problems/by-slug/{slug}", response_model=ProblemBase)
+def get_problem_by_slug(slug: str):
+    """Resolve a problem by its title slug (served from the in-process index)"""
+    entry = get_catalog_index().by_slug.get(slug)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    return entry._asdict()
+
+
+@app.get("/api/problems/by-frontend-id/{frontend_id}", response_model=ProblemBase)
+def get_problem_by_frontend_id(frontend_id: int):
+    """Resolve a problem by its LeetCode frontend id (served from the in-process index)"""
+    entry = get_catalog_index().by_frontend_id.get(frontend_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    return entry._asdict()
 
 
 @app.get("/api/problems/{problem_id}", response_model=ProblemResponse)
-def get_problem(problem_id: int, db: Session = Depends(get_db)):
+@db_route
+def get_problem(problem_id: int, db: Session = Depends(get_read_db)):
     """Get a specific problem by ID"""
-    problem = db.query(Problem).filter(Problem.problem_id == problem_id).first()
+    if CATALOG_CACHE_ENABLED:
+        snapshot = get_catalog_snapshot()
+        entry = snapshot.problem(problem_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Problem not found")
+        return fast_json(problem_entry_to_dict(entry, snapshot.solutions(problem_id)))
+    
+    problem = with_problem_relations(db.query(Problem)).filter(
+        Problem.problem_id == problem_id
+    ).first()
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
     return problem
 
 
-@app.get("/api/solutions/{problem_id}", response_model=List[SolutionResponse])
-def get_solutions(problem_id: int, db: Session = Depends(get_db)):
-    """Get all solutions for a problem"""
-    solutions = db.query(Solution).filter(Solution.problem_id == problem_id).all()
-    return solutions
+@app.get("/api/solutions/code/{solution_id}", response_model=SolutionResponse)
+@db_route
+def get_solution_code(solution_id: int, db: Session = Depends(get_read_db)):
+    """Get one solution, including its code"""
+    if CATALOG_CACHE_ENABLED:
+        solution = get_catalog_snapshot().solution(solution_id)
+    else:
+        solution = db.query(Solution).filter(Solution.id == solution_id).first()
+    if solution is None:
+        raise HTTPException(status_code=404, detail="Solution not found")
+    return fast_json(solution_to_dict(solution))
 
 
-@app.post("/api/contribute", response_model=ContributionResponse)
-async def contribute_solution(
-    contribution: ContributionRequest,
-    db: Session = Depends(get_db)
+@app.get("/api/solutions/{problem_id}", response_model=Union[List[SolutionResponse], List[SolutionMeta]])
+@db_route
+def get_solutions(
+    problem_id: int,
+    language: Optional[str] = None,
+    fields: SolutionFields = "full",
+    db: Session = Depends(get_read_db)
 ):
     """
-    Submit a new solution contribution
-    Creates a GitHub PR automatically
+    Get solutions for a problem, optionally for one language
+    fields=meta omits the code (length and SHA-256 only); fetch it via /api/solutions/code/{id}
     """
+    if CATALOG_CACHE_ENABLED:
+        solutions = get_catalog_snapshot().solutions(problem_id, language)
+        if fields == "meta":
+            return fast_json([solution_meta_to_dict(solution) for solution in solutions])
+        return fast_json([solution_to_dict(solution) for solution in solutions])
+    
+    if fields == "meta":
+        # Only blob metadata is read; rows still holding inline code are fingerprinted here
+        query = db.query(
+            Solution.id,
+            Solution.problem_id,
+            Solution.language,
+            Solution.source,
+            Solution.contributor_github,
+            Solution.contributed_at,
+            Solution.created_at,
+            Solution.code_hash,
+            CodeBlob.length.label("code_length"),
+            Solution.code_text
+        ).outerjoin(CodeBlob, CodeBlob.hash == Solution.code_hash)
+    else:
+        query = db.query(Solution).options(selectinload(Solution.blob))
+    
+    query = query.filter(Solution.problem_id == problem_id)
+    if language:
+        query = query.filter(func.lower(Solution.language) == language.lower())
+    solutions = query.order_by(Solution.id).all()
+    
+    if fields == "meta":
+        results = []
+        for row in solutions:
+            meta = solution_meta_to_dict(row)
+            meta["code_length"], meta["code_hash"] = code_fingerprint(row.code_hash, row.code_length, row.code_text)
+            results.append(meta)
+        return fast_json(results)
+    return fast_json([solution_to_dict(solution) for solution in solutions])
+
+
+def _check_contribution(db: Session, contribution: ContributionRequest):
+    """Duplicate/pending checks; returns (early response or None, problem title)"""
     # Check if solution already exists
     existing = db.query(Solution).filter(
         Solution.problem_id == contribution.problem_id,
@@ -123,7 +395,7 @@ async def contribute_solution(
         return ContributionResponse(
             status="duplicate",
             message=f"We already have a {contribution.language} solution for this problem"
-        )
+        ), None
     
     # Check if pending
     pending = db.query(PendingContribution).filter(
@@ -137,18 +409,50 @@ async def contribute_solution(
             status="pending",
             message="This solution is already under review",
             pr_url=pending.pr_url
-        )
+        ), None
     
     # Get problem details
     problem = db.query(Problem).filter(Problem.problem_id == contribution.problem_id).first()
     if not problem:
         raise HTTPException(status_code=404, detail="Problem not found")
+    return None, problem.title
+
+
+def _save_pending_contribution(db: Session, contribution: ContributionRequest, pr_data: dict):
+    pending_contrib = PendingContribution(
+        problem_id=contribution.problem_id,
+        language=contribution.language,
+        code_hash=put_code(db, contribution.code),
+        contributor_github=contribution.contributor_github,
+        pr_number=pr_data["number"],
+        pr_url=pr_data["url"],
+        status="pending",
+        runtime=contribution.runtime,
+        memory=contribution.memory
+    )
+    db.add(pending_contrib)
+    db.commit()
+
+
+@app.post("/api/contribute", response_model=ContributionResponse)
+async def contribute_solution(
+    contribution: ContributionRequest,
+    db=Depends(get_session)
+):
+    """
+    Submit a new solution contribution
+    Creates a GitHub PR automatically
+    """
+    # DB work goes through run_db so this coroutine never blocks the event loop
+    early_response, problem_title = await run_db(db, _check_contribution, contribution)
+    if early_response:
+        return early_response
     
     try:
         # Create GitHub PR
         pr_data = await github_service.create_contribution_pr(
             problem_id=contribution.problem_id,
-            problem_title=problem.title,
+            problem_title=problem_title,
             language=contribution.language,
             code=contribution.code,
             contributor_github=contribution.contributor_github,
@@ -157,19 +461,7 @@ async def contribute_solution(
         )
         
         # Save to pending contributions
-        pending_contrib = PendingContribution(
-            problem_id=contribution.problem_id,
-            language=contribution.language,
-            code=contribution.code,
-            contributor_github=contribution.contributor_github,
-            pr_number=pr_data["number"],
-            pr_url=pr_data["url"],
-            status="pending",
-            runtime=contribution.runtime,
-            memory=contribution.memory
-        )
-        db.add(pending_contrib)
-        db.commit()
+        await run_db(db, _save_pending_contribution, contribution, pr_data)
         
         return ContributionResponse(
             status="success",
@@ -179,35 +471,45 @@ async def contribute_solution(
         )
         
     except Exception as e:
+        if is_overload(e):
+            raise
         raise HTTPException(status_code=500, detail=f"Failed to create PR: {str(e)}")
 
 
 @app.get("/api/stats")
-def get_stats(db: Session = Depends(get_db)):
-    """Get database statistics"""
-    total_problems = db.query(Problem).count()
-    total_solutions = db.query(Solution).count()
-    total_pending = db.query(PendingContribution).filter(
-        PendingContribution.status == "pending"
-    ).count()
-    
-    # Language distribution
-    from sqlalchemy import func
-    language_stats = db.query(
-        Solution.language,
-        func.count(Solution.id).label("count")
-    ).group_by(Solution.language).all()
-    
+@db_route
+def get_stats(db: Session = Depends(get_read_db)):
+    """Get database statistics (trigger-maintained counters, no table scans)"""
+    # When the counts last changed, so the body (and its ETag) is stable in between
+    last_updated = counters_updated_at(db) or datetime.now()
     return {
-        "total_problems": total_problems,
-        "total_solutions": total_solutions,
-        "pending_contributions": total_pending,
-        "languages": {lang: count for lang, count in language_stats},
-        "last_updated": datetime.now().isoformat()
+        **stats_from_counters(read_counters(db)),
+        "last_updated": last_updated.isoformat()
     }
 
 
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Catalog cache hit/miss/reload counters"""
+    return cache_stats()
+
+
+@app.get("/api/debug/queries")
+def get_query_stats():
+    """Per-route SQL counts/timings and the rolling slow request log (DEBUG only)"""
+    if not DEBUG:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return query_stats_report()
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus exposition"""
+    return metrics_response()
+
+
 @app.get("/api/health")
+@db_route
 def health_check(db: Session = Depends(get_db)):
     """Health check endpoint"""
     try:
@@ -235,7 +537,7 @@ async def exchange_github_token(request: dict):
         
         # Exchange code for token using GitHub API
         import httpx
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(event_hooks=GITHUB_EVENT_HOOKS) as client:
             token_data = {
                 "client_id": os.getenv("GITHUB_CLIENT_ID"),
                 "client_secret": os.getenv("GITHUB_CLIENT_SECRET"),
@@ -0,0 +1,203 @@
+"""
+Prometheus metrics (/metrics)
+- HTTP: latency histogram per method/route/status, in-flight requests
+- DB pool (every engine, labelled): size/checked-out/overflow gauges, checkout counter, checkout wait histogram
+- GitHub: GitHubService call counts/errors/latency and raw API responses by status
+
+With several uvicorn/gunicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before start-up; each worker then writes its samples to
+mmap'd files there and /metrics aggregates all of them.
+"""
+import functools
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+
+from engine_profile import checkout_observers
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    multiprocess_mode="livesum"
+)
+
+# Pool metrics are labelled with the pool: primary, primary-async, replica-<n>[-async]
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured pool size", ["pool"], multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["pool"], multiprocess_mode="livesum"
+)
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond pool_size", ["pool"], multiprocess_mode="livesum")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts", "Connection checkouts from the pool", ["pool"])
+DB_POOL_CONNECTS = Counter("db_pool_connects", "New DBAPI connections opened", ["pool"])
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts", "Checkouts that gave up waiting (pool_timeout)", ["pool"])
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to obtain a connection (waiting for a free slot or opening a new one)",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+PROGRESS_BUFFER_DEPTH = Gauge(
+    "progress_buffer_depth", "Progress saves waiting in the write-behind buffer", multiprocess_mode="livesum"
+)
+PROGRESS_FLUSH_DURATION = Histogram(
+    "progress_flush_duration_seconds",
+    "Write-behind flush latency (one multi-row upsert per chunk)",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+PROGRESS_FLUSH_ITEMS = Histogram(
+    "progress_flush_items",
+    "Progress saves written per flush",
+    buckets=(1, 5, 10, 25, 50, 100, 200, 500, 1000, 5000)
+)
+PROGRESS_FLUSH_ERRORS = Counter("progress_flush_errors", "Write-behind flushes that failed and were retried")
+PROGRESS_BUFFER_OVERFLOWS = Counter(
+    "progress_buffer_overflows", "Saves arriving at a full write-behind buffer", ["outcome"]
+)
+
+GITHUB_CALLS = Counter("github_calls", "GitHubService operations", ["operation", "outcome"])
+GITHUB_CALL_DURATION = Histogram(
+    "github_call_duration_seconds",
+    "GitHubService operation latency",
+    ["operation"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+GITHUB_API_RESPONSES = Counter("github_api_responses", "Raw GitHub API responses", ["method", "status"])
+
+
+def _route_label(request: Request) -> str:
+    """Route template, so ids in paths don't create new series"""
+    route = request.scope.get("route")
+    return route.path if route is not None else "<not routed>"
+
+
+async def metrics_middleware(request: Request, call_next):
+    """Time every request and track how many are in flight"""
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_PROGRESS.dec()
+        HTTP_REQUEST_DURATION.labels(request.method, _route_label(request), str(status)).observe(
+            time.perf_counter() - started
+        )
+
+
+_engines = []
+
+
+def _pool_name(pool) -> str:
+    return pool.logging_name or "default"
+
+
+def _observe_checkout(pool_name: str, seconds: float, timed_out: bool):
+    DB_POOL_CHECKOUT_WAIT.labels(pool_name).observe(seconds)
+    if timed_out:
+        DB_POOL_TIMEOUTS.labels(pool_name).inc()
+
+
+def instrument_pool(engine):
+    """
+    Pool metrics for an engine (call once per engine: primary, replicas, sync and async).
+    Checkout/checkin/connect are pool events, so they follow the pool across
+    dispose(); checkout wait comes from engine_profile's timed pool classes.
+    """
+    engine = getattr(engine, "sync_engine", engine)
+    _engines.append(engine)
+    if _observe_checkout not in checkout_observers:
+        checkout_observers.append(_observe_checkout)
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.labels(_pool_name(engine.pool)).inc()
+        _update_pool_gauges(engine.pool)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _update_pool_gauges(engine.pool)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        DB_POOL_CONNECTS.labels(_pool_name(engine.pool)).inc()
+
+    _update_pool_gauges(engine.pool)
+
+
+def _update_pool_gauges(pool):
+    if not hasattr(pool, "checkedout"):
+        return  # NullPool/StaticPool have no size accounting
+    name = _pool_name(pool)
+    DB_POOL_SIZE.labels(name).set(pool.size())
+    DB_POOL_CHECKED_OUT.labels(name).set(pool.checkedout())
+    DB_POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+
+
+def observe_github_call(operation: str):
+    """Decorator for GitHubService coroutines: count calls/errors and time them"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                GITHUB_CALLS.labels(operation, "error").inc()
+                raise
+            else:
+                GITHUB_CALLS.labels(operation, "success").inc()
+                return result
+            finally:
+                GITHUB_CALL_DURATION.labels(operation).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+async def _count_github_response(response):
+    GITHUB_API_RESPONSES.labels(response.request.method, str(response.status_code)).inc()
+
+
+# httpx.AsyncClient(event_hooks=GITHUB_EVENT_HOOKS) records every API response
+GITHUB_EVENT_HOOKS = {"response": [_count_github_response]}
+
+
+def metrics_response() -> Response:
+    """Prometheus text exposition (all workers' samples in multiprocess mode)"""
+    for engine in _engines:
+        _update_pool_gauges(engine.pool)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the multiprocess directory on shutdown"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
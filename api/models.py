@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, DECIMAL, TIMESTAMP, ForeignKey, Table, JSON, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, Text, DECIMAL, TIMESTAMP, ForeignKey, Table, JSON, ARRAY, LargeBinary, BigInteger, UniqueConstraint, Computed
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
 try:
@@ -40,9 +40,9 @@ class Problem(Base):
     updated_at = Column(TIMESTAMP, default=datetime.now, onupdate=datetime.now)
     
     # Relationships
-    solutions = relationship("Solution", back_populates="problem", cascade="all, delete-orphan")
-    topics = relationship("Topic", secondary=problem_topics, back_populates="problems")
-    companies = relationship("Company", secondary=problem_companies, back_populates="problems")
+    solutions = relationship("Solution", back_populates="problem", cascade="all, delete-orphan", order_by="Solution.id")
+    topics = relationship("Topic", secondary=problem_topics, back_populates="problems", order_by="Topic.name")
+    companies = relationship("Company", secondary=problem_companies, back_populates="problems", order_by="Company.name")
 
 
 class Topic(Base):
@@ -67,13 +67,34 @@ class Company(Base):
     problems = relationship("Problem", secondary=problem_companies, back_populates="companies")
 
 
+class CodeBlob(Base):
+    """Compressed, deduplicated code keyed by the SHA-256 of its text (see code_store)"""
+    __tablename__ = "code_blobs"
+    
+    hash = Column(String(64), primary_key=True)
+    codec = Column(String(10), nullable=False)
+    length = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(TIMESTAMP, default=datetime.now)
+    
+    @property
+    def text(self) -> str:
+        try:
+            from code_store import decompress_code
+        except ImportError:
+            from api.code_store import decompress_code
+        return decompress_code(self.codec, self.data)
+
+
 class Solution(Base):
     __tablename__ = "solutions"
     
     id = Column(Integer, primary_key=True, index=True)
     problem_id = Column(Integer, ForeignKey("problems.problem_id", ondelete="CASCADE"), nullable=False)
     language = Column(String(50), nullable=False, index=True)
-    code = Column(Text, nullable=False)
+    # Inline code from before code_blobs existed; new rows only set code_hash
+    code_text = Column("code", Text)
+    code_hash = Column(String(64), ForeignKey("code_blobs.hash"), index=True)
     
     source = Column(String(50), default="official")
     contributor_github = Column(String(100))
@@ -84,6 +105,11 @@ class Solution(Base):
     
     # Relationships
     problem = relationship("Problem", back_populates="solutions")
+    blob = relationship("CodeBlob")
+    
+    @property
+    def code(self):
+        return self.blob.text if self.code_hash else self.code_text
 
 
 class PendingContribution(Base):
@@ -92,7 +118,8 @@ class PendingContribution(Base):
     id = Column(Integer, primary_key=True, index=True)
     problem_id = Column(Integer, ForeignKey("problems.problem_id", ondelete="CASCADE"), nullable=False)
     language = Column(String(50), nullable=False)
-    code = Column(Text, nullable=False)
+    code_text = Column("code", Text)
+    code_hash = Column(String(64), ForeignKey("code_blobs.hash"), index=True)
     
     contributor_github = Column(String(100), nullable=False)
     pr_number = Column(Integer)
@@ -105,10 +132,18 @@ class PendingContribution(Base):
     
     runtime = Column(String(50))
     memory = Column(String(50))
+    
+    blob = relationship("CodeBlob")
+    
+    @property
+    def code(self):
+        return self.blob.text if self.code_hash else self.code_text
 
 
 class UserProgress(Base):
     __tablename__ = "user_progress"
+    # One row per solved problem and language; save_progress upserts on it
+    __table_args__ = (UniqueConstraint("user_id", "problem_id", "language"),)
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(100), nullable=False, index=True)
@@ -117,10 +152,21 @@ class UserProgress(Base):
     language = Column(String(50))
     runtime = Column(String(50))
     memory = Column(String(50))
-    solution_code = Column(Text)
+    # Legacy inline code: loaded only when accessed (listings read has_code instead)
+    solution_code_text = deferred(Column("solution_code", Text))
+    code_hash = Column(String(64), ForeignKey("code_blobs.hash"), index=True)
     notes = Column(Text)
     github_synced = Column(Boolean, default=False)
     github_url = Column(String(500))
+    updated_at = Column(TIMESTAMP)  # set by the change-tracking trigger, not by the ORM
+    has_code = Column(Boolean, Computed("code_hash IS NOT NULL OR COALESCE(solution_code, '') <> ''", persisted=True))
+    # change_xid (XID8, set by trigger) is only compared in SQL by the changes endpoint
+    
+    blob = relationship("CodeBlob")
+    
+    @property
+    def solution_code(self):
+        return self.blob.text if self.code_hash else self.solution_code_text
 
 
 class UserRoadmap(Base):
@@ -156,7 +202,25 @@ class Roadmap(Base):
     description = Column(Text)
     category = Column(String(50))
     total_problems = Column(Integer)
-    problem_ids = Column(ARRAY(Integer))
+    problem_ids = Column(ARRAY(Integer))  # legacy copy; membership is read from roadmap_problems
     difficulty_distribution = Column(JSON)
     created_at = Column(TIMESTAMP, default=datetime.now)
 
+
+class RoadmapProblem(Base):
+    __tablename__ = "roadmap_problems"
+    # Ordered membership: the primary key (roadmap_id, position) is the sheet order
+    __table_args__ = (UniqueConstraint("roadmap_id", "problem_id"),)
+    
+    roadmap_id = Column(Integer, ForeignKey("roadmaps.id", ondelete="CASCADE"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    problem_id = Column(Integer, ForeignKey("problems.problem_id", ondelete="CASCADE"), nullable=False, index=True)
+
+
+class StatCounter(Base):
+    """Trigger-maintained counters backing /api/stats (see counters.py)"""
+    __tablename__ = "stat_counters"
+    
+    name = Column(String(150), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, default=datetime.now)
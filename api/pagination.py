@@ -0,0 +1,61 @@
+"""
+Keyset (cursor) pagination helpers
+Cursors are opaque to clients: base64url-encoded JSON holding the last seen key.
+"""
+import base64
+import json
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: int, field: str = "pid") -> str:
+    """Build an opaque cursor pointing just after value (a problem_id, or a roadmap position with field="pos")"""
+    payload = json.dumps({"v": 1, field: value}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str = "pid") -> int:
+    """Return the key a cursor points after"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return int(payload[field])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate_by_problem_id(query, key_column, cursor, limit, skip=0):
+    """
+    Apply keyset pagination on key_column (ascending)
+    skip is only honoured for legacy offset requests without a cursor.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    query = query.order_by(key_column)
+    if cursor:
+        query = query.filter(key_column > decode_cursor(cursor))
+    elif skip:
+        query = query.offset(skip)
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].problem_id)
+    return rows, None
+
+
+def paginate_by_position(query, position_column, cursor, limit):
+    """
+    Keyset pagination in roadmap order: query must select position_column.
+    Without a limit every row is returned. Returns (rows, next_cursor).
+    """
+    query = query.order_by(position_column)
+    if cursor:
+        query = query.filter(position_column > decode_cursor(cursor, "pos"))
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].position, "pos")
+    return rows, None
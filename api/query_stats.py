@@ -0,0 +1,195 @@
+"""
+Per-request SQL instrumentation
+Engine events tally every statement into the current request's QueryStats,
+held in a contextvar (Starlette copies it into the threadpool that runs sync
+handlers). After each request the middleware:
+- adds a Server-Timing header when DEBUG is on
+- updates per-route aggregates and a rolling log of slow requests (served at
+  /api/debug/queries only when DEBUG is on; query strings are never recorded)
+- warns when one statement shape runs N_PLUS_ONE_THRESHOLD+ times (probable N+1)
+Queries issued while a streaming body is sent (exports) are not attributed.
+"""
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION_ENABLED", "true").lower() in ("1", "true", "yes")
+DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_LOG_SIZE = int(os.getenv("SLOW_REQUEST_LOG_SIZE", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+# Bind placeholders (psycopg2 %(name)s, asyncpg $n), including expanded IN lists
+_PLACEHOLDERS = re.compile(r"(?:%\(\w+\)s|\$\d+)(?:\s*,\s*(?:%\(\w+\)s|\$\d+))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """Statement with parameters collapsed to ?, so IN lists of any length compare equal"""
+    return _WHITESPACE.sub(" ", _PLACEHOLDERS.sub("?", statement)).strip()
+
+
+class QueryStats:
+    """SQL activity of one request"""
+
+    __slots__ = ("count", "db_time", "rows", "slowest_time", "slowest_statement", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest_time = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement: str, elapsed: float, rows: int):
+        self.count += 1
+        self.db_time += elapsed
+        if rows > 0:
+            self.rows += rows
+        if elapsed >= self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self) -> List[Tuple[str, int]]:
+        """Statement shapes executed N_PLUS_ONE_THRESHOLD or more times"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= N_PLUS_ONE_THRESHOLD]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def instrument_engine(engine):
+    """Attach the cursor-execute hooks to an engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        started = conn.info.get("query_started")
+        if stats is None or not started:
+            return
+        stats.record(statement, time.perf_counter() - started.pop(), cursor.rowcount)
+
+
+_routes = {}
+_slow_requests = deque(maxlen=SLOW_REQUEST_LOG_SIZE)
+_reported_n_plus_one = set()
+
+
+def _route_name(request: Request) -> str:
+    """Path template (not the raw path) so aggregates don't grow per id; 304s and 404s never reach a route"""
+    route = request.scope.get("route")
+    return f"{request.method} {route.path}" if route is not None else f"{request.method} <not routed>"
+
+
+def _server_timing(stats: QueryStats, total_ms: float, repeated) -> str:
+    metrics = [
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.count} queries, {stats.rows} rows"',
+        f"db-slowest;dur={stats.slowest_time * 1000:.2f}",
+        f"total;dur={total_ms:.2f}"
+    ]
+    if repeated:
+        metrics.append(f'n-plus-one;desc="{len(repeated)} repeated statement shapes"')
+    return ", ".join(metrics)
+
+
+def _record(request: Request, route: str, status: int, stats: QueryStats, total_ms: float, repeated):
+    aggregate = _routes.setdefault(route, {
+        "requests": 0, "queries": 0, "db_ms": 0.0, "total_ms": 0.0,
+        "max_queries": 0, "max_total_ms": 0.0, "n_plus_one_requests": 0
+    })
+    aggregate["requests"] += 1
+    aggregate["queries"] += stats.count
+    aggregate["db_ms"] += stats.db_time * 1000
+    aggregate["total_ms"] += total_ms
+    aggregate["max_queries"] = max(aggregate["max_queries"], stats.count)
+    aggregate["max_total_ms"] = max(aggregate["max_total_ms"], total_ms)
+
+    if repeated:
+        aggregate["n_plus_one_requests"] += 1
+        for shape, n in repeated:
+            if (route, shape) not in _reported_n_plus_one:
+                _reported_n_plus_one.add((route, shape))
+                logger.warning("Probable N+1 in %s: statement ran %d times: %s", route, n, shape[:300])
+
+    if total_ms >= SLOW_REQUEST_MS:
+        _slow_requests.append({
+            "at": datetime.now().isoformat(),
+            "route": route,
+            "path": request.url.path,
+            "status": status,
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(stats.db_time * 1000, 2),
+            "queries": stats.count,
+            "rows": stats.rows,
+            "slowest_ms": round(stats.slowest_time * 1000, 2),
+            "slowest_statement": statement_shape(stats.slowest_statement)[:1000] if stats.slowest_statement else None,
+            "n_plus_one": [{"shape": shape[:300], "count": n} for shape, n in repeated]
+        })
+        logger.warning(
+            "Slow request %s %s: %.1f ms (%d queries, %.1f ms in db)",
+            route, request.url.path, total_ms, stats.count, stats.db_time * 1000
+        )
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """Collect SQL stats for the request; Server-Timing header in DEBUG mode"""
+    if not SQL_INSTRUMENTATION_ENABLED:
+        return await call_next(request)
+
+    stats = QueryStats()
+    token = _current.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+    total_ms = (time.perf_counter() - started) * 1000
+
+    repeated = stats.repeated_shapes()
+    _record(request, _route_name(request), response.status_code, stats, total_ms, repeated)
+    if DEBUG:
+        response.headers["Server-Timing"] = _server_timing(stats, total_ms, repeated)
+    return response
+
+
+def query_stats_report() -> dict:
+    """Per-route aggregates plus the slow request log"""
+    return {
+        "enabled": SQL_INSTRUMENTATION_ENABLED,
+        "slow_request_ms": SLOW_REQUEST_MS,
+        "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+        "routes": {
+            route: {
+                **aggregate,
+                "db_ms": round(aggregate["db_ms"], 2),
+                "total_ms": round(aggregate["total_ms"], 2),
+                "max_total_ms": round(aggregate["max_total_ms"], 2),
+                "avg_queries": round(aggregate["queries"] / aggregate["requests"], 2)
+            }
+            for route, aggregate in sorted(_routes.items())
+        },
+        "slow_requests": list(_slow_requests)
+    }
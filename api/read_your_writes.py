@@ -0,0 +1,76 @@
+"""
+Read-your-writes with replicas, carried by the client
+A response to a request that wrote on the primary gets the write time both as
+an X-Last-Write header and as an lb_last_write cookie. A client that sends
+either back within READ_YOUR_WRITES_SECONDS has its user-scoped reads
+(get_user_read_db) served by the primary, so they see the write whatever
+worker or instance serves them. Older tokens go to replicas as usual.
+Nothing is added when no replica is configured.
+"""
+import math
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.requests import Request
+
+from database import DATABASE_REPLICA_URLS, get_db, get_read_db
+
+# How long after a write the client's reads stay on the primary (covers replica lag)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+LAST_WRITE_HEADER = "X-Last-Write"
+LAST_WRITE_COOKIE = "lb_last_write"
+
+# Per-request holder (a mutable dict, so writes from threadpool/greenlet copies of the context are seen)
+_request_writes: ContextVar[Optional[dict]] = ContextVar("request_writes", default=None)
+
+
+def note_user_write():
+    """Mark the current request as having written on the primary"""
+    writes = _request_writes.get()
+    if writes is not None and DATABASE_REPLICA_URLS:
+        writes["at"] = time.time()
+
+
+def _last_write(request: Request) -> Optional[float]:
+    token = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(token) if token else None
+    except ValueError:
+        return None
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the client reports a write within READ_YOUR_WRITES_SECONDS"""
+    written_at = _last_write(request)
+    if written_at is None:
+        return False
+    age = time.time() - written_at
+    # Small negative ages are clock skew between instances; far-future tokens are ignored
+    return -READ_YOUR_WRITES_SECONDS < age < READ_YOUR_WRITES_SECONDS
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Hand the client a last-write token when the request wrote"""
+    writes = {}
+    token = _request_writes.set(writes)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_writes.reset(token)
+    if "at" in writes:
+        value = f"{writes['at']:.3f}"
+        response.headers[LAST_WRITE_HEADER] = value
+        response.set_cookie(
+            LAST_WRITE_COOKIE, value, max_age=math.ceil(READ_YOUR_WRITES_SECONDS), httponly=True, samesite="lax"
+        )
+    return response
+
+
+def get_user_read_db(request: Request):
+    """Like get_read_db, but on the primary right after the client's own writes"""
+    if wrote_recently(request):
+        yield from get_db()
+    else:
+        yield from get_read_db()
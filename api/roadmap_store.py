@@ -0,0 +1,72 @@
+"""
+Roadmap membership storage
+Every roadmap (curated sheet or topic) is a roadmaps row; its problems live in
+roadmap_problems with a 1-based position, so listing a roadmap in sheet order
+(or one page of it) is a range scan of the (roadmap_id, position) primary key.
+migrate.py writes memberships through save_roadmap; the API only reads them.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert
+
+try:
+    from models import Problem, Roadmap, RoadmapProblem
+except ImportError:
+    from api.models import Problem, Roadmap, RoadmapProblem
+
+
+def topic_roadmap_name(topic_name: str) -> str:
+    """Roadmap name for a topic ("Heap (Priority Queue)" -> "topic_Heap_(Priority_Queue)")"""
+    return f"topic_{topic_name.replace(' ', '_')}"
+
+
+def roadmap_id_by_name(name: str, db) -> Optional[int]:
+    """
+    Roadmap id for a name. Falls back to a case-insensitive match, so links
+    such as "topic_array" (resolved by title-casing before topics were rows) keep working.
+    """
+    roadmap_id = db.query(Roadmap.id).filter(Roadmap.name == name).scalar()
+    if roadmap_id is None:
+        roadmap_id = db.query(Roadmap.id).filter(
+            func.lower(Roadmap.name) == name.lower()
+        ).order_by(Roadmap.id).limit(1).scalar()
+    return roadmap_id
+
+
+def save_roadmap(db, name: str, display_name: str, description: str, category: str,
+                 problem_ids: Iterable[int]) -> Roadmap:
+    """
+    Create or update a roadmap and replace its membership with problem_ids, in
+    that order. Duplicates keep their first position; ids missing from problems
+    are skipped. The caller commits.
+    """
+    ordered = list(dict.fromkeys(problem_ids))
+    known = {
+        problem_id for (problem_id,) in
+        db.query(Problem.problem_id).filter(Problem.problem_id.in_(ordered))
+    } if ordered else set()
+    members: List[int] = [problem_id for problem_id in ordered if problem_id in known]
+
+    difficulties = db.query(Problem.difficulty, func.count(Problem.id)).filter(
+        Problem.problem_id.in_(members)
+    ).group_by(Problem.difficulty).all() if members else []
+
+    roadmap = db.query(Roadmap).filter(Roadmap.name == name).first()
+    if roadmap is None:
+        roadmap = Roadmap(name=name)
+        db.add(roadmap)
+    roadmap.display_name = display_name
+    roadmap.description = description
+    roadmap.category = category
+    roadmap.total_problems = len(members)
+    roadmap.problem_ids = members
+    roadmap.difficulty_distribution = {difficulty: count for difficulty, count in difficulties}
+    db.flush()
+
+    db.execute(delete(RoadmapProblem).where(RoadmapProblem.roadmap_id == roadmap.id))
+    if members:
+        db.execute(insert(RoadmapProblem), [
+            {"roadmap_id": roadmap.id, "position": position, "problem_id": problem_id}
+            for position, problem_id in enumerate(members, 1)
+        ])
+    return roadmap
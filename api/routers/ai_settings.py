@@ -5,6 +5,7 @@ from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
 from database import get_db
+from async_db import db_route, get_session, run_db
 from models import UserAISettings
 
 router = APIRouter(prefix="/api/ai-settings", tags=["ai-settings"])
@@ -107,6 +108,7 @@ def get_available_providers():
     }
 
 @router.get("/{user_id}", response_model=AISettingsResponse)
+@db_route
 def get_user_ai_settings(user_id: str, db: Session = Depends(get_db)):
     """Get user's AI provider settings"""
     settings = db.query(UserAISettings).filter(UserAISettings.user_id == user_id).first()
@@ -141,6 +143,7 @@ def get_user_ai_settings(user_id: str, db: Session = Depends(get_db)):
     )
 
 @router.get("/{user_id}/key")
+@db_route
 def get_user_api_key(user_id: str, db: Session = Depends(get_db)):
     """Get user's decrypted API key (for extension use)"""
     settings = db.query(UserAISettings).filter(UserAISettings.user_id == user_id).first()
@@ -155,6 +158,7 @@ def get_user_api_key(user_id: str, db: Session = Depends(get_db)):
     }
 
 @router.post("/{user_id}/configure")
+@db_route
 def configure_ai_provider(
     user_id: str,
     config: AIProviderConfig,
@@ -194,9 +198,11 @@ def configure_ai_provider(
     }
 
 @router.post("/{user_id}/test")
-async def test_ai_connection(user_id: str, db: Session = Depends(get_db)):
+async def test_ai_connection(user_id: str, db=Depends(get_session)):
     """Test AI provider connection"""
-    settings = db.query(UserAISettings).filter(UserAISettings.user_id == user_id).first()
+    settings = await run_db(
+        db, lambda session: session.query(UserAISettings).filter(UserAISettings.user_id == user_id).first()
+    )
     
     if not settings or not settings.enabled:
         raise HTTPException(status_code=400, detail="AI settings not configured")
@@ -213,6 +219,7 @@ async def test_ai_connection(user_id: str, db: Session = Depends(get_db)):
     }
 
 @router.delete("/{user_id}")
+@db_route
 def delete_ai_settings(user_id: str, db: Session = Depends(get_db)):
     """Delete user's AI settings"""
     settings = db.query(UserAISettings).filter(UserAISettings.user_id == user_id).first()
@@ -0,0 +1,150 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from typing import Iterator, List, Literal, Optional
+import zlib
+
+from database import SessionLocal
+from models import Problem, Solution, Topic, Company, CodeBlob
+from loaders import topic_names_column, company_names_column
+from code_store import decompress_code
+from serialization import dumps_line
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+PROBLEM_COLUMNS = {
+    "problem_id": Problem.problem_id,
+    "title": Problem.title,
+    "title_slug": Problem.title_slug,
+    "difficulty": Problem.difficulty,
+    "acceptance_rate": Problem.acceptance_rate,
+    "frontend_id": Problem.frontend_id,
+    "is_premium": Problem.is_premium,
+    "problem_url": Problem.problem_url,
+    "created_at": Problem.created_at,
+    "updated_at": Problem.updated_at,
+}
+
+SOLUTION_COLUMNS = {
+    "id": Solution.id,
+    "problem_id": Solution.problem_id,
+    "language": Solution.language,
+    "code": Solution.code_text,  # resolved from code_blobs when the row has a code_hash
+    "source": Solution.source,
+    "contributor_github": Solution.contributor_github,
+    "contributed_at": Solution.contributed_at,
+    "created_at": Solution.created_at,
+}
+
+EXPORT_TYPES = ("topics", "companies", "problems", "solutions")
+
+
+def _parse_columns(value: Optional[str], available: dict, label: str) -> List[str]:
+    """Comma-separated column list -> validated names (all columns when omitted)"""
+    if not value:
+        return list(available)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {label} columns: {', '.join(unknown)}"
+        )
+    return names
+
+
+def _catalog_lines(types: List[str], problem_columns: List[str], solution_columns: List[str]) -> Iterator[bytes]:
+    """
+    Yield one JSON line per row: {"type": "...", ...columns}
+    Each table is read through a server-side cursor, so memory stays flat.
+    """
+    db = SessionLocal()
+    try:
+        def stream(statement):
+            return db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        if "topics" in types:
+            for row in stream(select(Topic.id, Topic.name).order_by(Topic.id)):
+                yield dumps_line({"type": "topic", "id": row.id, "name": row.name})
+
+        if "companies" in types:
+            for row in stream(select(Company.id, Company.name).order_by(Company.id)):
+                yield dumps_line({"type": "company", "id": row.id, "name": row.name})
+
+        if "problems" in types:
+            columns = [PROBLEM_COLUMNS[name].label(name) for name in problem_columns]
+            statement = select(*columns, topic_names_column(), company_names_column()).order_by(Problem.problem_id)
+            for row in stream(statement):
+                record = {"type": "problem", **row._asdict()}
+                record["topics"] = record["topics"] or []
+                record["companies"] = record["companies"] or []
+                yield dumps_line(record)
+
+        if "solutions" in types:
+            columns = [SOLUTION_COLUMNS[name].label(name) for name in solution_columns]
+            statement = select(*columns)
+            with_code = "code" in solution_columns
+            if with_code:
+                statement = statement.add_columns(
+                    CodeBlob.codec.label("_codec"),
+                    CodeBlob.data.label("_data")
+                ).outerjoin(CodeBlob, CodeBlob.hash == Solution.code_hash)
+            statement = statement.order_by(Solution.problem_id, Solution.id)
+            for row in stream(statement):
+                record = {"type": "solution", **row._asdict()}
+                if with_code:
+                    codec, data = record.pop("_codec"), record.pop("_data")
+                    if data is not None:
+                        record["code"] = decompress_code(codec, data)
+                yield dumps_line(record)
+    finally:
+        db.close()
+
+
+def _gzip_stream(lines: Iterator[bytes]) -> Iterator[bytes]:
+    """Incrementally gzip a byte stream, flushing roughly every 64 KiB of input"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    for line in lines:
+        chunk = compressor.compress(line)
+        pending += len(line)
+        if pending >= 65536:
+            chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+@router.get("/catalog.ndjson")
+def export_catalog(
+    types: str = ",".join(EXPORT_TYPES),
+    problem_columns: Optional[str] = None,
+    solution_columns: Optional[str] = None,
+    compress: Optional[Literal["gzip"]] = None
+):
+    """
+    Stream the catalog as newline-delimited JSON
+    - types: which record types to emit (topics, companies, problems, solutions)
+    - problem_columns / solution_columns: comma-separated column subsets
+    - compress=gzip: gzip the stream (Content-Encoding: gzip)
+    """
+    selected = [name.strip() for name in types.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in EXPORT_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown export types: {', '.join(unknown)}")
+
+    lines = _catalog_lines(
+        selected,
+        _parse_columns(problem_columns, PROBLEM_COLUMNS, "problem"),
+        _parse_columns(solution_columns, SOLUTION_COLUMNS, "solution")
+    )
+
+    headers = {"Content-Disposition": 'inline; filename="catalog.ndjson"'}
+    if compress == "gzip":
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(_gzip_stream(lines), media_type="application/x-ndjson", headers=headers)
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
@@ -1,11 +1,36 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from sqlalchemy import literal_column, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
+import base64
+import binascii
+import logging
+import os
 
-from database import get_db
+from database import SessionLocal, get_db
+from engine_profile import is_overload
+from async_db import db_route
+from read_your_writes import get_user_read_db, note_user_write
 from models import UserProgress, Problem
+from code_store import code_blobs_insert
+from catalog_index import get_catalog_index
+from write_behind import (
+    PROGRESS_BUFFER_FULL,
+    PROGRESS_FLUSH_INTERVAL_MS,
+    BufferFull,
+    count_overflow,
+    create_progress_buffer
+)
+
+logger = logging.getLogger(__name__)
+
+# POST /api/progress/batch limits; a chunk is one multi-row upsert and one transaction
+PROGRESS_BATCH_MAX_ITEMS = int(os.getenv("PROGRESS_BATCH_MAX_ITEMS", "1000"))
+PROGRESS_BATCH_CHUNK_SIZE = int(os.getenv("PROGRESS_BATCH_CHUNK_SIZE", "200"))
 
 router = APIRouter(prefix="/api/progress", tags=["progress"])
 
@@ -20,103 +45,375 @@ class SaveProgressRequest(BaseModel):
     notes: Optional[str] = None
     github_synced: bool = False
     github_url: Optional[str] = None
+    solved_at: Optional[datetime] = None  # when replaying queued submissions; defaults to now
 
 class ProgressResponse(BaseModel):
     success: bool
     message: str
     progress_id: Optional[int] = None
 
+class BatchProgressRequest(BaseModel):
+    items: List[SaveProgressRequest] = Field(max_length=PROGRESS_BATCH_MAX_ITEMS)
+
+class BatchItemResult(BaseModel):
+    index: int
+    success: bool
+    status: str  # saved, updated, duplicate, not_found, failed
+    progress_id: Optional[int] = None
+    message: Optional[str] = None
+
+class BatchProgressResponse(BaseModel):
+    saved: int
+    updated: int
+    failed: int
+    results: List[BatchItemResult]
+
+# Columns a repeat submission overwrites
+UPSERT_COLUMNS = (
+    "code_hash", "solution_code", "runtime", "memory", "notes", "solved_at", "github_synced", "github_url"
+)
+
+# SQLSTATE foreign_key_violation: the problem doesn't exist (blobs are inserted in the same statement)
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def progress_upsert(rows: List[dict]):
+    """
+    INSERT ... ON CONFLICT (user_id, problem_id, language) DO UPDATE for user_progress rows,
+    returning each row's id and whether it was inserted (xmax = 0) or updated
+    """
+    table = UserProgress.__table__
+    statement = insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "problem_id", "language"],
+        set_={column: statement.excluded[column] for column in UPSERT_COLUMNS}
+    ).returning(
+        table.c.id, table.c.user_id, table.c.problem_id, table.c.language,
+        literal_column("xmax = 0").label("inserted")
+    )
+
+
+def _progress_row(request: SaveProgressRequest, code_hash: Optional[str], now: datetime) -> dict:
+    return {
+        "user_id": request.user_id,
+        "problem_id": request.problem_id,
+        "language": request.language,
+        "code_hash": code_hash,
+        "solution_code": None,
+        "runtime": request.runtime,
+        "memory": request.memory,
+        "notes": request.notes,
+        "solved_at": request.solved_at or now,
+        "github_synced": request.github_synced,
+        "github_url": request.github_url
+    }
+
+
+def _write_progress(db: Session, items: List[SaveProgressRequest], now: datetime):
+    """Blob inserts, upsert and problem check (FK) for one chunk in one statement; caller commits"""
+    hashes, blobs = code_blobs_insert([item.solution_code for item in items])
+    statement = progress_upsert([_progress_row(item, code_hash, now) for item, code_hash in zip(items, hashes)])
+    if blobs is not None:
+        statement = statement.add_cte(blobs.cte("new_blobs"))
+    return db.execute(statement).all()
+
+
+def _flush_progress(entries: List[dict]):
+    """
+    Write-behind flush: buffered saves as multi-row upserts. Saves the database
+    refuses (problem deleted since it was queued, bad data) are dropped with a log
+    line so they can't block the buffer; connection errors propagate and the
+    buffer retries.
+    """
+    items = [SaveProgressRequest(**entry) for entry in entries]
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        for start in range(0, len(items), PROGRESS_BATCH_CHUNK_SIZE):
+            chunk = items[start:start + PROGRESS_BATCH_CHUNK_SIZE]
+            try:
+                _write_progress(db, chunk, now)
+                db.commit()
+            except (IntegrityError, DataError):
+                db.rollback()
+                # Find the offending saves one by one
+                for item in chunk:
+                    try:
+                        _write_progress(db, [item], now)
+                        db.commit()
+                    except (IntegrityError, DataError) as e:
+                        db.rollback()
+                        logger.error(
+                            "Dropping queued progress save (user %s, problem #%s, %s): %s",
+                            item.user_id, item.problem_id, item.language, e.orig
+                        )
+    finally:
+        db.close()
+
+
+# Background writer for PROGRESS_WRITE_BEHIND (None when saves are written inline)
+progress_buffer = create_progress_buffer(_flush_progress)
+
+
+def _queue_progress(request: SaveProgressRequest) -> Optional[ProgressResponse]:
+    """
+    Buffer a save for the write-behind flusher. Returns None when it should be
+    written inline instead: problem not in the catalog index (the FK check gives
+    the 404) or a full buffer in PROGRESS_BUFFER_FULL=sync mode.
+    """
+    try:
+        known = request.problem_id in get_catalog_index().by_problem_id
+    except Exception:
+        known = False
+    if not known:
+        return None
+    
+    entry = request.model_dump(mode="json")
+    entry["solved_at"] = (request.solved_at or datetime.now()).isoformat()
+    try:
+        progress_buffer.put(entry)
+    except BufferFull:
+        if PROGRESS_BUFFER_FULL == "sync":
+            count_overflow("sync")
+            return None
+        count_overflow("rejected")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many pending saves, retry shortly",
+            headers={"Retry-After": str(max(1, round(PROGRESS_FLUSH_INTERVAL_MS / 1000)))}
+        )
+    note_user_write()
+    return ProgressResponse(success=True, message="Progress queued")
+
+
 # Save or update user progress
 @router.post("/save", response_model=ProgressResponse)
+@db_route
 def save_progress(
     request: SaveProgressRequest,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Save user's solution progress to database.
     Called when user submits a solution on LeetCode.
     Stores code, runtime, memory, notes, and GitHub sync status.
+    With PROGRESS_WRITE_BEHIND the save is acknowledged with 202 once buffered
+    (progress_id is null) and written by the next flush; its GitHub sync
+    status is then set through /{user_id}/{problem_id}/{language}/github-sync.
     """
+    if progress_buffer is not None:
+        queued = _queue_progress(request)
+        if queued is not None:
+            response.status_code = 202
+            return queued
+    
     try:
-        # Verify problem exists
-        problem = db.query(Problem).filter(
-            Problem.problem_id == request.problem_id
-        ).first()
-        
-        if not problem:
+        saved = _write_progress(db, [request], datetime.now())[0]
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Problem #{request.problem_id} not found"
             )
-        
-        # Check if progress already exists
-        existing = db.query(UserProgress).filter(
-            UserProgress.user_id == request.user_id,
-            UserProgress.problem_id == request.problem_id,
-            UserProgress.language == request.language
-        ).first()
-        
-        if existing:
-            # Update existing progress
-            existing.solution_code = request.solution_code
-            existing.runtime = request.runtime
-            existing.memory = request.memory
-            existing.notes = request.notes
-            existing.solved_at = datetime.now()
-            existing.github_synced = request.github_synced
-            existing.github_url = request.github_url
-            
-            db.commit()
-            
-            return ProgressResponse(
-                success=True,
-                message="Progress updated successfully",
-                progress_id=existing.id
-            )
-        else:
-            # Create new progress entry
-            progress = UserProgress(
-                user_id=request.user_id,
-                problem_id=request.problem_id,
-                language=request.language,
-                solution_code=request.solution_code,
-                runtime=request.runtime,
-                memory=request.memory,
-                notes=request.notes,
-                solved_at=datetime.now(),
-                github_synced=request.github_synced,
-                github_url=request.github_url
-            )
-            
-            db.add(progress)
-            db.commit()
-            db.refresh(progress)
-            
-            return ProgressResponse(
-                success=True,
-                message="Progress saved successfully",
-                progress_id=progress.id
-            )
-            
-    except HTTPException:
-        raise
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save progress: {str(e)}"
+        )
     except Exception as e:
         db.rollback()
+        if is_overload(e):
+            raise  # 503 from main.py's handlers
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save progress: {str(e)}"
         )
+    
+    note_user_write()
+    return ProgressResponse(
+        success=True,
+        message="Progress saved successfully" if saved.inserted else "Progress updated successfully",
+        progress_id=saved.id
+    )
+
+# Save many submissions at once
+@router.post("/batch", response_model=BatchProgressResponse)
+@db_route
+def save_progress_batch(
+    request: BatchProgressRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Save queued submissions (offline replay, history backfill) in bulk.
+    Problem ids are checked in one query; the rest is written in chunks of
+    PROGRESS_BATCH_CHUNK_SIZE, one multi-row upsert and commit per chunk, so a
+    failing chunk doesn't undo the others. When the batch holds several items
+    for the same user/problem/language the last one is written and the earlier
+    ones are reported as duplicates.
+    """
+    items = request.items
+    results: List[Optional[dict]] = [None] * len(items)
+    
+    problem_ids = {item.problem_id for item in items}
+    known = {
+        problem_id for (problem_id,) in
+        db.query(Problem.problem_id).filter(Problem.problem_id.in_(problem_ids))
+    } if problem_ids else set()
+    
+    latest = {}
+    for index, item in enumerate(items):
+        if item.problem_id in known:
+            latest[(item.user_id, item.problem_id, item.language)] = index
+        else:
+            results[index] = {
+                "index": index, "success": False, "status": "not_found",
+                "message": f"Problem #{item.problem_id} not found"
+            }
+    
+    writes = sorted(latest.values())
+    now = datetime.now()
+    for start in range(0, len(writes), PROGRESS_BATCH_CHUNK_SIZE):
+        chunk = writes[start:start + PROGRESS_BATCH_CHUNK_SIZE]
+        try:
+            rows = _write_progress(db, [items[index] for index in chunk], now)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if is_overload(e):
+                raise  # 503: the client retries the batch (chunks already written are upserted again)
+            for index in chunk:
+                results[index] = {
+                    "index": index, "success": False, "status": "failed",
+                    "message": f"Failed to save progress: {str(e)}"
+                }
+            continue
+        
+        saved = {(row.user_id, row.problem_id, row.language): row for row in rows}
+        for index in chunk:
+            item = items[index]
+            row = saved[(item.user_id, item.problem_id, item.language)]
+            results[index] = {
+                "index": index, "success": True,
+                "status": "saved" if row.inserted else "updated", "progress_id": row.id
+            }
+    
+    for index, item in enumerate(items):
+        if results[index] is None:
+            kept = latest[(item.user_id, item.problem_id, item.language)]
+            results[index] = {
+                **results[kept], "index": index, "status": "duplicate",
+                "message": f"Superseded by item {kept}"
+            }
+    
+    if writes:
+        note_user_write()
+    
+    statuses = [result["status"] for result in results]
+    return BatchProgressResponse(
+        saved=statuses.count("saved"),
+        updated=statuses.count("updated"),
+        failed=sum(not result["success"] for result in results),
+        results=results
+    )
+
+def _encode_watermark(xmin: str) -> str:
+    return base64.urlsafe_b64encode(f"xmin:{xmin}".encode()).decode().rstrip("=")
+
+
+def _decode_watermark(token: str) -> str:
+    """Transaction id inside a watermark token (400 if it isn't one of ours)"""
+    try:
+        value = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        value = ""
+    prefix, _, xmin = value.partition(":")
+    if prefix != "xmin" or not xmin.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid since token")
+    return xmin
+
+
+# Get progress rows changed since a watermark (registered before /{user_id}/{problem_id})
+@router.get("/{user_id}/changes")
+@db_route
+def get_progress_changes(
+    user_id: str,
+    since: Optional[str] = None,
+    db: Session = Depends(get_user_read_db)
+):
+    """
+    Delta sync: the user's progress rows written after `since` (all rows when omitted),
+    without code, plus the watermark to send next time.
+    The watermark is the oldest transaction still running when the rows were read,
+    so a write that commits later is never skipped; rows near the boundary may be
+    sent twice, which clients absorb by upserting on id.
+    """
+    # Taken before the read: everything older has committed and is visible below
+    watermark = db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text")).scalar()
+    
+    query = db.query(
+        UserProgress.id,
+        UserProgress.problem_id,
+        UserProgress.language,
+        UserProgress.solved_at,
+        UserProgress.updated_at,
+        UserProgress.runtime,
+        UserProgress.memory,
+        UserProgress.notes,
+        UserProgress.github_synced,
+        UserProgress.github_url,
+        UserProgress.has_code
+    ).filter(UserProgress.user_id == user_id)
+    if since:
+        query = query.filter(
+            text("user_progress.change_xid >= CAST(CAST(:since AS TEXT) AS XID8)").bindparams(
+                since=_decode_watermark(since)
+            )
+        )
+    
+    changes = [{
+        "id": row.id,
+        "problem_id": row.problem_id,
+        "language": row.language,
+        "solved_at": row.solved_at.isoformat() if row.solved_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "runtime": row.runtime,
+        "memory": row.memory,
+        "notes": row.notes,
+        "github_synced": row.github_synced,
+        "github_url": row.github_url,
+        "has_code": row.has_code
+    } for row in query.order_by(UserProgress.id)]
+    
+    return {
+        "changes": changes,
+        "watermark": _encode_watermark(watermark),
+        "full": since is None
+    }
 
 # Get user's progress for a specific problem
 @router.get("/{user_id}/{problem_id}")
+@db_route
 def get_problem_progress(
     user_id: str,
     problem_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_read_db)
 ):
     """Get all progress entries for a user on a specific problem"""
     
-    progress_entries = db.query(UserProgress).filter(
+    # Listing columns only: code (inline or blob) is never read here
+    progress_entries = db.query(
+        UserProgress.id,
+        UserProgress.language,
+        UserProgress.solved_at,
+        UserProgress.runtime,
+        UserProgress.memory,
+        UserProgress.notes,
+        UserProgress.github_synced,
+        UserProgress.github_url,
+        UserProgress.has_code
+    ).filter(
         UserProgress.user_id == user_id,
         UserProgress.problem_id == problem_id
     ).all()
@@ -135,18 +432,19 @@ def get_problem_progress(
             "notes": entry.notes,
             "github_synced": entry.github_synced,
             "github_url": entry.github_url,
-            "has_code": bool(entry.solution_code)
+            "has_code": entry.has_code
         })
     
     return {"solutions": solutions}
 
 # Get user's solution code
 @router.get("/{user_id}/{problem_id}/{language}/code")
+@db_route
 def get_solution_code(
     user_id: str,
     problem_id: int,
     language: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_user_read_db)
 ):
     """Get the actual solution code for a specific language"""
     
@@ -173,6 +471,7 @@ def get_solution_code(
 
 # Update GitHub sync status
 @router.patch("/{progress_id}/github-sync")
+@db_route
 def update_github_sync(
     progress_id: int,
     github_url: str,
@@ -191,5 +490,40 @@ def update_github_sync(
     progress.github_url = github_url
     
     db.commit()
+    note_user_write()
+    
+    return {"success": True, "message": "GitHub sync status updated"}
+
+# Update GitHub sync status of a user's solution (also for saves still write-behind buffered)
+@router.patch("/{user_id}/{problem_id}/{language}/github-sync")
+@db_route
+def update_solution_github_sync(
+    user_id: str,
+    problem_id: int,
+    language: str,
+    github_url: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Update GitHub sync status after upload, addressed like the code endpoint.
+    A 202-acknowledged save has no progress_id yet; while it is still buffered
+    the status is written together with it.
+    """
+    changes = {"github_synced": True, "github_url": github_url}
+    if progress_buffer is not None and progress_buffer.amend((user_id, problem_id, language), changes):
+        note_user_write()
+        return {"success": True, "message": "GitHub sync status queued"}
+    
+    updated = db.query(UserProgress).filter(
+        UserProgress.user_id == user_id,
+        UserProgress.problem_id == problem_id,
+        UserProgress.language == language
+    ).update(changes, synchronize_session=False)
+    
+    if not updated:
+        raise HTTPException(status_code=404, detail="Progress entry not found")
+    
+    db.commit()
+    note_user_write()
     
     return {"success": True, "message": "GitHub sync status updated"}
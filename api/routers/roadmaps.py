@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text
+from sqlalchemy import func
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from database import get_db
-from models import Problem, Solution, Topic, UserProgress, UserRoadmap, Roadmap
+from database import get_db, get_read_db
+from async_db import db_route
+from read_your_writes import get_user_read_db, note_user_write
+from models import Problem, Solution, UserProgress, UserRoadmap, Roadmap, RoadmapProblem
+from loaders import topic_names_column
+from pagination import NEXT_CURSOR_HEADER, paginate_by_position
+from roadmap_store import roadmap_id_by_name, topic_roadmap_name
+from catalog_index import get_catalog_index
+from catalog_cache import CATALOG_CACHE_ENABLED, get_catalog_snapshot
+from serialization import fast_json
 
 router = APIRouter(prefix="/api/roadmaps", tags=["roadmaps"])
 
@@ -43,13 +51,17 @@ class UserProgressResponse(BaseModel):
 
 # Get all available roadmaps
 @router.get("/", response_model=List[RoadmapInfo])
-def get_roadmaps(db: Session = Depends(get_db)):
+@db_route
+def get_roadmaps(db: Session = Depends(get_read_db)):
     """Get all available learning paths"""
     
     roadmaps = []
     
-    # 1. Curated roadmaps from database
-    curated = db.query(Roadmap).filter(Roadmap.category == 'curated').all()
+    # 1. Curated roadmaps (from the catalog cache when enabled)
+    if CATALOG_CACHE_ENABLED:
+        curated = [r for r in get_catalog_snapshot().roadmaps.values() if r.category == 'curated']
+    else:
+        curated = db.query(Roadmap).filter(Roadmap.category == 'curated').all()
     
     for roadmap in curated:
         roadmaps.append(RoadmapInfo(
@@ -62,16 +74,9 @@ def get_roadmaps(db: Session = Depends(get_db)):
         ))
     
     # 2. Topic-based roadmaps (ordered by learning progression)
-    # Get all topics with counts
-    topics = db.query(
-        Topic.name,
-        func.count(Problem.problem_id).label('total')
-    ).join(
-        Problem.topics
-    ).group_by(Topic.name).all()
-    
-    # Convert to dict for easy lookup
-    topic_counts = {topic.name: topic.total for topic in topics}
+    # Topic counts come from the in-memory catalog index (no GROUP BY per call)
+    index = get_catalog_index()
+    topic_counts = index.facet_counts(index.all_bits)["topics"]
     
     # Learning order (Striver's A2Z progression)
     learning_order = [
@@ -115,7 +120,7 @@ def get_roadmaps(db: Session = Depends(get_db)):
     for topic_name in learning_order:
         if topic_name in topic_counts:
             roadmaps.append(RoadmapInfo(
-                name=f"topic_{topic_name.replace(' ', '_')}",
+                name=topic_roadmap_name(topic_name),
                 display_name=f"{topic_name} Mastery",
                 category="topic",
                 total_problems=topic_counts[topic_name],
@@ -126,7 +131,7 @@ def get_roadmaps(db: Session = Depends(get_db)):
     for topic_name, count in topic_counts.items():
         if topic_name not in learning_order:
             roadmaps.append(RoadmapInfo(
-                name=f"topic_{topic_name.replace(' ', '_')}",
+                name=topic_roadmap_name(topic_name),
                 display_name=f"{topic_name} Mastery",
                 category="topic",
                 total_problems=count,
@@ -135,40 +140,76 @@ def get_roadmaps(db: Session = Depends(get_db)):
     
     return roadmaps
 
+def _roadmap_problems_from_db(
+    roadmap_name: str, difficulty: Optional[str], cursor: Optional[str], limit: Optional[int], db: Session
+):
+    """Roadmap problems in sheet order (a range scan of roadmap_problems), as column rows"""
+    roadmap_id = roadmap_id_by_name(roadmap_name, db)
+    if roadmap_id is None:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+    
+    # Only the listed columns are loaded; topic names are aggregated in the same query
+    query = db.query(
+        RoadmapProblem.position,
+        Problem.id,
+        Problem.problem_id,
+        Problem.title,
+        Problem.title_slug,
+        Problem.difficulty,
+        Problem.acceptance_rate,
+        Problem.problem_url,
+        topic_names_column()
+    ).join(
+        Problem, Problem.problem_id == RoadmapProblem.problem_id
+    ).filter(RoadmapProblem.roadmap_id == roadmap_id)
+    
+    # Filter by difficulty if specified
+    if difficulty:
+        query = query.filter(Problem.difficulty == difficulty.capitalize())
+    
+    return paginate_by_position(query, RoadmapProblem.position, cursor, limit)
+
+def _roadmap_problems_from_cache(
+    roadmap_name: str, difficulty: Optional[str], cursor: Optional[str], limit: Optional[int]
+):
+    """Same rows as _roadmap_problems_from_db, resolved from the catalog snapshot"""
+    snapshot = get_catalog_snapshot()
+    roadmap = snapshot.roadmap(roadmap_name)
+    if not roadmap:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+    return snapshot.roadmap_page(roadmap, difficulty.capitalize() if difficulty else None, cursor, limit)
+
 # Get problems for a specific roadmap
 @router.get("/{roadmap_name}/problems", response_model=List[ProblemWithProgress])
+@db_route
 def get_roadmap_problems(
     roadmap_name: str,
+    response: Response,
     user_id: Optional[str] = None,
     difficulty: Optional[str] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_user_read_db)
 ):
-    """Get all problems for a roadmap with user progress"""
+    """
+    Get a roadmap's problems in sheet order with user progress.
+    With limit, one page is returned; pass the X-Next-Cursor response header
+    back as ?cursor= for the next one.
+    """
+    if limit is not None:
+        limit = max(1, min(limit, 1000))
     
-    # Determine roadmap type
-    if roadmap_name.startswith("topic_"):
-        # Topic-based roadmap
-        topic_name = roadmap_name.replace("topic_", "").replace("_", " ").title()
-        query = db.query(Problem).join(Problem.topics).filter(Topic.name == topic_name)
+    if CATALOG_CACHE_ENABLED:
+        problems, next_cursor = _roadmap_problems_from_cache(roadmap_name, difficulty, cursor, limit)
     else:
-        # Curated roadmap - get from roadmaps table
-        roadmap = db.query(Roadmap).filter(Roadmap.name == roadmap_name).first()
-        if not roadmap:
-            raise HTTPException(status_code=404, detail="Roadmap not found")
-        
-        query = db.query(Problem).filter(Problem.problem_id.in_(roadmap.problem_ids))
-    
-    # Filter by difficulty if specified
-    if difficulty:
-        query = query.filter(Problem.difficulty == difficulty.capitalize())
-    
-    # Order by problem_id
-    problems = query.order_by(Problem.problem_id).all()
+        problems, next_cursor = _roadmap_problems_from_db(roadmap_name, difficulty, cursor, limit, db)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     # Get user progress if user_id provided
     user_completed = {}
     if user_id:
-        progress = db.query(UserProgress).filter(
+        progress = db.query(UserProgress.problem_id, UserProgress.solved_at, UserProgress.language).filter(
             UserProgress.user_id == user_id,
             UserProgress.problem_id.in_([p.problem_id for p in problems])
         ).all()
@@ -181,71 +222,49 @@ def get_roadmap_problems(
                 }
             user_completed[p.problem_id]['languages'].append(p.language)
     
-    # Build response
+    # Build response (plain dicts in ProblemWithProgress shape, serialized by the fast path)
     result = []
     for problem in problems:
         completed_info = user_completed.get(problem.problem_id, {})
         
-        result.append(ProblemWithProgress(
-            id=problem.id,
-            problem_id=problem.problem_id,
-            title=problem.title,
-            title_slug=problem.title_slug,
-            difficulty=problem.difficulty,
-            acceptance_rate=float(problem.acceptance_rate) if problem.acceptance_rate else None,
-            problem_url=problem.problem_url,
-            topics=[t.name for t in problem.topics],
-            completed=problem.problem_id in user_completed,
-            solved_at=completed_info.get('solved_at'),
-            languages=completed_info.get('languages', [])
-        ))
+        result.append({
+            "id": problem.id,
+            "problem_id": problem.problem_id,
+            "title": problem.title,
+            "title_slug": problem.title_slug,
+            "difficulty": problem.difficulty,
+            "acceptance_rate": float(problem.acceptance_rate) if problem.acceptance_rate else None,
+            "problem_url": problem.problem_url,
+            "topics": list(problem.topics or []),
+            "completed": problem.problem_id in user_completed,
+            "solved_at": completed_info.get('solved_at'),
+            "languages": completed_info.get('languages', [])
+        })
     
-    return result
+    return fast_json(result, response)
 
-# Get user progress for a roadmap
-@router.get("/{roadmap_name}/progress/{user_id}", response_model=UserProgressResponse)
-def get_user_progress(
-    roadmap_name: str,
-    user_id: str,
-    db: Session = Depends(get_db)
-):
-    """Get user's progress on a specific roadmap"""
+def _roadmap_progress(roadmap_name: str, user_id: str, db: Session) -> UserProgressResponse:
+    """Completion counts for one user on one roadmap (zeros for an unknown roadmap)"""
+    
+    roadmap_id = roadmap_id_by_name(roadmap_name, db)
     
     # Get total problems in roadmap
-    if roadmap_name.startswith("topic_"):
-        topic_name = roadmap_name.replace("topic_", "").replace("_", " ").title()
-        total_problems = db.query(func.count(Problem.problem_id)).join(
-            Problem.topics
-        ).filter(Topic.name == topic_name).scalar()
-    else:
-        total_problems = db.query(func.count(Problem.problem_id)).filter(
-            text(f"'{roadmap_name}' = ANY(problems.roadmaps)")
-        ).scalar()
+    total_problems = db.query(func.count(RoadmapProblem.problem_id)).filter(
+        RoadmapProblem.roadmap_id == roadmap_id
+    ).scalar()
     
     # Get completed problems
-    if roadmap_name.startswith("topic_"):
-        topic_name = roadmap_name.replace("topic_", "").replace("_", " ").title()
-        completed_query = db.query(
-            func.count(UserProgress.problem_id.distinct()).label('completed'),
-            Problem.difficulty,
-        ).join(
-            Problem, UserProgress.problem_id == Problem.problem_id
-        ).join(
-            Problem.topics
-        ).filter(
-            UserProgress.user_id == user_id,
-            Topic.name == topic_name
-        ).group_by(Problem.difficulty).all()
-    else:
-        completed_query = db.query(
-            func.count(UserProgress.problem_id.distinct()).label('completed'),
-            Problem.difficulty,
-        ).join(
-            Problem, UserProgress.problem_id == Problem.problem_id
-        ).filter(
-            UserProgress.user_id == user_id,
-            text(f"'{roadmap_name}' = ANY(problems.roadmaps)")
-        ).group_by(Problem.difficulty).all()
+    completed_query = db.query(
+        func.count(UserProgress.problem_id.distinct()).label('completed'),
+        Problem.difficulty,
+    ).join(
+        RoadmapProblem, RoadmapProblem.problem_id == UserProgress.problem_id
+    ).join(
+        Problem, UserProgress.problem_id == Problem.problem_id
+    ).filter(
+        UserProgress.user_id == user_id,
+        RoadmapProblem.roadmap_id == roadmap_id
+    ).group_by(Problem.difficulty).all()
     
     completed_problems = sum(row.completed for row in completed_query)
     by_difficulty = {row.difficulty: row.completed for row in completed_query}
@@ -265,8 +284,20 @@ def get_user_progress(
         last_activity=last_activity
     )
 
+# Get user progress for a roadmap
+@router.get("/{roadmap_name}/progress/{user_id}", response_model=UserProgressResponse)
+@db_route
+def get_user_progress(
+    roadmap_name: str,
+    user_id: str,
+    db: Session = Depends(get_user_read_db)
+):
+    """Get user's progress on a specific roadmap"""
+    return _roadmap_progress(roadmap_name, user_id, db)
+
 # Activate a roadmap for user
 @router.post("/{roadmap_name}/activate/{user_id}")
+@db_route
 def activate_roadmap(
     roadmap_name: str,
     user_id: str,
@@ -292,12 +323,14 @@ def activate_roadmap(
         db.add(new_roadmap)
     
     db.commit()
+    note_user_write()
     
     return {"success": True, "message": f"Roadmap {roadmap_name} activated"}
 
 # Get user's active roadmaps
 @router.get("/user/{user_id}/active")
-def get_user_active_roadmaps(user_id: str, db: Session = Depends(get_db)):
+@db_route
+def get_user_active_roadmaps(user_id: str, db: Session = Depends(get_user_read_db)):
     """Get all active roadmaps for a user"""
     
     roadmaps = db.query(UserRoadmap).filter(
@@ -308,7 +341,7 @@ def get_user_active_roadmaps(user_id: str, db: Session = Depends(get_db)):
     result = []
     for roadmap in roadmaps:
         # Get progress
-        progress = get_user_progress(roadmap.roadmap_name, user_id, db)
+        progress = _roadmap_progress(roadmap.roadmap_name, user_id, db)
         result.append({
             "roadmap_name": roadmap.roadmap_name,
             "started_at": roadmap.started_at,
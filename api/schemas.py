@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 
@@ -28,6 +28,23 @@ class SolutionResponse(SolutionBase):
         from_attributes = True
 
 
+class SolutionMeta(BaseModel):
+    """Solution listing row without the code body"""
+    id: int
+    problem_id: int
+    language: str
+    source: Optional[str] = None
+    contributor_github: Optional[str] = None
+    contributed_at: Optional[datetime] = None
+    created_at: datetime
+    code_length: int
+    code_hash: str
+
+
+# Projection for solution listings: "full" includes code, "meta" doesn't
+SolutionFields = Literal["full", "meta"]
+
+
 class ProblemBase(BaseModel):
     problem_id: int
     title: str
@@ -50,6 +67,17 @@ class ProblemResponse(ProblemBase):
         from_attributes = True
 
 
+class ProblemSummary(BaseModel):
+    """Lean listing row: no solutions, topic/company names only"""
+    problem_id: int
+    title: str
+    title_slug: str
+    difficulty: str
+    acceptance_rate: Optional[float] = None
+    topics: List[str] = []
+    companies: List[str] = []
+
+
 class ContributionRequest(BaseModel):
     problem_id: int
     language: str
@@ -66,9 +94,42 @@ class ContributionResponse(BaseModel):
     pr_number: Optional[int] = None
 
 
+# Projection for problem listings: "full" embeds solutions, "summary" doesn't
+ProblemFields = Literal["full", "summary"]
+
+
+# How values inside one facet combine: "all" = AND, "any" = OR
+FacetMatch = Literal["all", "any"]
+
+
 class FilterRequest(BaseModel):
     difficulty: Optional[str] = None
+    difficulties: Optional[List[str]] = None
     topics: Optional[List[str]] = None
     companies: Optional[List[str]] = None
+    topic_match: FacetMatch = "any"
+    company_match: FacetMatch = "any"
+    include_facets: bool = False
     skip: int = 0
     limit: int = 100
+
+
+class ProblemSearchHit(ProblemSummary):
+    score: float
+
+
+class TitleSearchResponse(BaseModel):
+    query: str
+    results: List[ProblemSearchHit]
+
+
+class FacetCounts(BaseModel):
+    topics: Dict[str, int] = {}
+    companies: Dict[str, int] = {}
+    difficulties: Dict[str, int] = {}
+
+
+class ProblemSearchResponse(BaseModel):
+    total: int
+    results: List[ProblemSummary]
+    facets: Optional[FacetCounts] = None
@@ -0,0 +1,141 @@
+"""
+Fast JSON path for large catalog payloads
+Handlers that return trusted ORM rows can build plain dicts with the helpers
+below and wrap them in FastJSONResponse, skipping per-row pydantic validation.
+Uses orjson when installed, otherwise compact stdlib json.
+The dict shapes mirror the response models declared on each route.
+"""
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def dumps_line(record: dict) -> bytes:
+    """One NDJSON line (record + newline) for streaming exports"""
+    if orjson is not None:
+        return orjson.dumps(record, default=_default, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8") + b"\n"
+
+
+def fast_json(content, response: Response = None):
+    """
+    Wrap content in FastJSONResponse when enabled, else let FastAPI validate it
+    Headers set on the injected response (e.g. pagination cursors) are carried over.
+    """
+    if not FAST_JSON_RESPONSES:
+        return content
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return FastJSONResponse(content, headers=headers)
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+def solution_meta_to_dict(solution) -> dict:
+    """Shape of schemas.SolutionMeta (solution must expose code_length/code_hash)"""
+    return {
+        "id": solution.id,
+        "problem_id": solution.problem_id,
+        "language": solution.language,
+        "source": solution.source,
+        "contributor_github": solution.contributor_github,
+        "contributed_at": solution.contributed_at,
+        "created_at": solution.created_at,
+        "code_length": solution.code_length,
+        "code_hash": solution.code_hash
+    }
+
+
+def solution_to_dict(solution) -> dict:
+    """Shape of schemas.SolutionResponse"""
+    return {
+        "language": solution.language,
+        "code": solution.code,
+        "source": solution.source,
+        "contributor_github": solution.contributor_github,
+        "id": solution.id,
+        "problem_id": solution.problem_id,
+        "contributed_at": solution.contributed_at,
+        "created_at": solution.created_at
+    }
+
+
+def problem_to_dict(problem) -> dict:
+    """Shape of schemas.ProblemResponse (relations must already be loaded)"""
+    return {
+        "problem_id": problem.problem_id,
+        "title": problem.title,
+        "title_slug": problem.title_slug,
+        "difficulty": problem.difficulty,
+        "acceptance_rate": _float(problem.acceptance_rate),
+        "frontend_id": problem.frontend_id,
+        "is_premium": bool(problem.is_premium),
+        "problem_url": problem.problem_url,
+        "id": problem.id,
+        "topics": [{"name": t.name} for t in problem.topics],
+        "companies": [{"name": c.name} for c in problem.companies],
+        "solutions": [solution_to_dict(s) for s in problem.solutions],
+        "created_at": problem.created_at
+    }
+
+
+def summary_row_to_dict(row) -> dict:
+    """Shape of schemas.ProblemSummary from a column-projected row"""
+    return {
+        "problem_id": row.problem_id,
+        "title": row.title,
+        "title_slug": row.title_slug,
+        "difficulty": row.difficulty,
+        "acceptance_rate": _float(row.acceptance_rate),
+        "topics": row.topics or [],
+        "companies": row.companies or []
+    }
+
+
+def problem_entry_to_dict(entry, solutions) -> dict:
+    """Shape of schemas.ProblemResponse from a cached ProblemEntry and its solutions"""
+    return {
+        "problem_id": entry.problem_id,
+        "title": entry.title,
+        "title_slug": entry.title_slug,
+        "difficulty": entry.difficulty,
+        "acceptance_rate": entry.acceptance_rate,
+        "frontend_id": entry.frontend_id,
+        "is_premium": entry.is_premium,
+        "problem_url": entry.problem_url,
+        "id": entry.id,
+        "topics": [{"name": name} for name in entry.topics],
+        "companies": [{"name": name} for name in entry.companies],
+        "solutions": [solution_to_dict(s) for s in solutions],
+        "created_at": entry.created_at
+    }
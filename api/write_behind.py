@@ -0,0 +1,304 @@
+"""
+Write-behind buffer for progress saves (PROGRESS_WRITE_BEHIND=true)
+save_progress acknowledges once a submission is in this buffer; a background
+thread flushes it as multi-row upserts every PROGRESS_FLUSH_INTERVAL_MS or as
+soon as PROGRESS_FLUSH_MAX_ITEMS are waiting, so a burst costs one commit per
+flush instead of one per request. Pending saves for the same user/problem/
+language coalesce (the latest wins), as the upsert would.
+
+Durability (PROGRESS_BUFFER_DURABILITY):
+- memory:  acknowledged saves still pending are lost if the process dies
+- journal: each save is appended to a local journal first (survives a crash
+           of the process, not of the machine)
+- fsync:   journal + fsync before acknowledging (survives power loss)
+Journal segments live in PROGRESS_JOURNAL_DIR as progress-<pid>-<seq>.jsonl.
+A segment is deleted once everything pending when it was closed has been
+committed; at start-up a worker adopts segments of dead processes and replays them.
+
+When PROGRESS_BUFFER_MAX_ITEMS saves are pending, PROGRESS_BUFFER_FULL decides:
+"reject" answers 503 with Retry-After, "sync" writes that save directly.
+"""
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from metrics import (
+    PROGRESS_BUFFER_DEPTH,
+    PROGRESS_BUFFER_OVERFLOWS,
+    PROGRESS_FLUSH_DURATION,
+    PROGRESS_FLUSH_ERRORS,
+    PROGRESS_FLUSH_ITEMS
+)
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_WRITE_BEHIND = os.getenv("PROGRESS_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+PROGRESS_FLUSH_INTERVAL_MS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", "50"))
+PROGRESS_FLUSH_MAX_ITEMS = int(os.getenv("PROGRESS_FLUSH_MAX_ITEMS", "200"))
+PROGRESS_BUFFER_MAX_ITEMS = int(os.getenv("PROGRESS_BUFFER_MAX_ITEMS", "5000"))
+PROGRESS_BUFFER_FULL = os.getenv("PROGRESS_BUFFER_FULL", "reject").lower()
+PROGRESS_BUFFER_DURABILITY = os.getenv("PROGRESS_BUFFER_DURABILITY", "memory").lower()
+PROGRESS_JOURNAL_DIR = os.getenv("PROGRESS_JOURNAL_DIR", "progress-journal")
+
+# Back-off after a failed flush (database down): items stay buffered meanwhile
+FLUSH_RETRY_SECONDS = 1.0
+
+# progress-<pid>-<seq>.jsonl, or progress-<pid>-claimed-<id>.jsonl while being adopted
+_SEGMENT = re.compile(r"progress-(\d+)-(\d+|claimed-[0-9a-f]+)\.jsonl$")
+
+
+class BufferFull(Exception):
+    """The buffer holds PROGRESS_BUFFER_MAX_ITEMS pending saves"""
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Journal:
+    """Append-only segments of pending saves (one JSON document per line)"""
+
+    def __init__(self, directory: str, fsync: bool):
+        self.directory = directory
+        self.fsync = fsync
+        self.pid = os.getpid()
+        os.makedirs(directory, exist_ok=True)
+        self.seq = 0
+        self._file = None
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"progress-{self.pid}-{seq}.jsonl")
+
+    def adopt_orphans(self) -> List[dict]:
+        """Entries left by dead processes (including an earlier run of this one), oldest first"""
+        segments = []
+        for path in glob.glob(os.path.join(self.directory, "progress-*.jsonl")):
+            match = _SEGMENT.search(path)
+            if not match:
+                continue
+            pid, seq = int(match.group(1)), match.group(2)
+            if pid != self.pid and _process_alive(pid):
+                continue
+            try:
+                segments.append((os.path.getmtime(path), pid, int(seq) if seq.isdigit() else 0, path))
+            except FileNotFoundError:
+                continue  # claimed by another worker meanwhile
+
+        # Claim every segment under a unique name first (rename is atomic; another
+        # worker may win the race). Renaming straight to progress-<pid>-<n> could
+        # overwrite a leftover segment of an earlier process with the same pid.
+        claimed = []
+        for _, _, _, path in sorted(segments):
+            target = os.path.join(self.directory, f"progress-{self.pid}-claimed-{uuid.uuid4().hex}.jsonl")
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+
+        # Our numbered segments are all claimed now, so renumbering cannot collide;
+        # the first flush after start-up releases them with the rest
+        entries = []
+        for path in claimed:
+            self.seq += 1
+            numbered = self._path(self.seq)
+            os.rename(path, numbered)
+            with open(numbered, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        logger.warning("Skipping torn journal line in %s", numbered)
+        return entries
+
+    def open_segment(self):
+        self.seq += 1
+        self._file = open(self._path(self.seq), "a", encoding="utf-8")
+
+    def append(self, entry: dict):
+        self._file.write(json.dumps(entry, default=str) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> int:
+        """Close the current segment, start a new one; returns the closed segment's number"""
+        closed = self.seq
+        self._file.close()
+        self.open_segment()
+        return closed
+
+    def release(self, up_to: int):
+        """Delete segments <= up_to: their entries are committed"""
+        for seq in range(1, up_to + 1):
+            try:
+                os.remove(self._path(seq))
+            except FileNotFoundError:
+                pass
+
+    def close(self, flushed: bool):
+        """Close the current segment, deleting it (and all before it) if nothing is pending"""
+        if self._file is not None:
+            self._file.close()
+        if flushed:
+            self.release(self.seq)
+
+
+class ProgressBuffer:
+    """Bounded, coalescing buffer flushed by a background thread through write(entries)"""
+
+    def __init__(self, write: Callable[[List[dict]], None], journal: Optional[Journal] = None):
+        self._write = write
+        self._journal = journal
+        self._pending = OrderedDict()
+        self._in_flight = {}  # entries of the flush being written, by key
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        if self._journal is not None:
+            for entry in self._journal.adopt_orphans():
+                self._pending[self._key(entry)] = entry
+                self._pending.move_to_end(self._key(entry))
+            if self._pending:
+                logger.warning("Replaying %d journaled progress saves", len(self._pending))
+            self._journal.open_segment()
+        PROGRESS_BUFFER_DEPTH.set(len(self._pending))
+        self._thread = threading.Thread(target=self._run, name="progress-write-behind", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _key(entry: dict):
+        return entry["user_id"], entry["problem_id"], entry["language"]
+
+    def put(self, entry: dict):
+        """Queue a save (raises BufferFull); journaled before returning when durability asks for it"""
+        key = self._key(entry)
+        with self._lock:
+            if key not in self._pending and len(self._pending) >= PROGRESS_BUFFER_MAX_ITEMS:
+                raise BufferFull()
+            if self._journal is not None:
+                self._journal.append(entry)
+            self._pending[key] = entry
+            self._pending.move_to_end(key)
+            PROGRESS_BUFFER_DEPTH.set(len(self._pending))
+            if len(self._pending) >= PROGRESS_FLUSH_MAX_ITEMS:
+                self._wake.notify()
+
+    def amend(self, key, changes: dict) -> bool:
+        """
+        Update fields of a save not yet committed (pending, or in the flush being
+        written, in which case it is queued again with the changes). False when
+        nothing for that user/problem/language is waiting.
+        """
+        with self._lock:
+            entry = self._pending.get(key) or self._in_flight.get(key)
+            if entry is None:
+                return False
+            entry = {**entry, **changes}
+            if self._journal is not None:
+                self._journal.append(entry)
+            self._pending[key] = entry
+            PROGRESS_BUFFER_DEPTH.set(len(self._pending))
+            return True
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                self._wake.wait_for(
+                    lambda: self._stopped or len(self._pending) >= PROGRESS_FLUSH_MAX_ITEMS,
+                    timeout=PROGRESS_FLUSH_INTERVAL_MS / 1000
+                )
+                if self._stopped:
+                    return
+            if not self.flush():
+                time.sleep(FLUSH_RETRY_SECONDS)
+
+    def flush(self) -> bool:
+        """Write everything pending now; on failure it goes back into the buffer"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                entries = list(self._pending.values())
+                self._in_flight = dict(self._pending)
+                self._pending.clear()
+                segment = self._journal.rotate() if self._journal is not None else 0
+
+            started = time.perf_counter()
+            try:
+                self._write(entries)
+            except Exception as e:
+                PROGRESS_FLUSH_ERRORS.inc()
+                logger.warning("Progress flush of %d saves failed, will retry: %s", len(entries), e)
+                with self._lock:
+                    # Saves queued meanwhile are newer: keep them, put the rest back in front
+                    merged = OrderedDict((self._key(entry), entry) for entry in entries)
+                    merged.update(self._pending)
+                    self._pending = merged
+                    PROGRESS_BUFFER_DEPTH.set(len(self._pending))
+                return False
+            finally:
+                PROGRESS_FLUSH_DURATION.observe(time.perf_counter() - started)
+                with self._lock:
+                    self._in_flight = {}
+
+            PROGRESS_FLUSH_ITEMS.observe(len(entries))
+            PROGRESS_BUFFER_DEPTH.set(len(self._pending))
+            if self._journal is not None:
+                self._journal.release(segment)
+            return True
+
+    def close(self, timeout: float = 30.0):
+        """Stop the flusher and write what is left (shutdown)"""
+        with self._lock:
+            self._stopped = True
+            self._wake.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while self._pending and not self.flush() and time.monotonic() < deadline:
+            time.sleep(FLUSH_RETRY_SECONDS)
+        if self._pending:
+            logger.error(
+                "%d progress saves not written at shutdown%s", len(self._pending),
+                " (kept in the journal)" if self._journal is not None else ""
+            )
+        if self._journal is not None:
+            self._journal.close(flushed=not self._pending)
+
+
+def count_overflow(outcome: str):
+    PROGRESS_BUFFER_OVERFLOWS.labels(outcome).inc()
+
+
+def create_progress_buffer(write: Callable[[List[dict]], None]) -> Optional[ProgressBuffer]:
+    """Buffer configured from the environment, or None when write-behind is off"""
+    if not PROGRESS_WRITE_BEHIND:
+        return None
+    if PROGRESS_BUFFER_DURABILITY not in ("memory", "journal", "fsync"):
+        raise ValueError(f"Unknown PROGRESS_BUFFER_DURABILITY: {PROGRESS_BUFFER_DURABILITY}")
+    journal = None
+    if PROGRESS_BUFFER_DURABILITY != "memory":
+        journal = Journal(PROGRESS_JOURNAL_DIR, fsync=PROGRESS_BUFFER_DURABILITY == "fsync")
+    return ProgressBuffer(write, journal)
@@ -46,12 +46,25 @@ CREATE TABLE problem_companies (
     PRIMARY KEY (problem_id, company_id)
 );
 
+-- Content-addressed code storage, shared by solutions, contributions and progress
+CREATE TABLE code_blobs (
+    hash VARCHAR(64) PRIMARY KEY,  -- SHA-256 of the code
+    codec VARCHAR(10) NOT NULL,    -- 'zlib', 'zstd' or 'none'
+    length INTEGER NOT NULL,       -- characters of code
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- data is already compressed; keep Postgres from trying pglz again
+ALTER TABLE code_blobs ALTER COLUMN data SET STORAGE EXTERNAL;
+
 -- Solutions table
 CREATE TABLE solutions (
     id SERIAL PRIMARY KEY,
     problem_id INTEGER REFERENCES problems(problem_id) ON DELETE CASCADE,
     language VARCHAR(50) NOT NULL,
-    code TEXT NOT NULL,
+    code TEXT,  -- legacy inline code; new rows use code_hash
+    code_hash VARCHAR(64) REFERENCES code_blobs(hash),
     
     -- Metadata
     source VARCHAR(50) DEFAULT 'official',  -- 'official' or 'community'
@@ -73,10 +86,14 @@ CREATE TABLE user_progress (
     language VARCHAR(50),
     runtime VARCHAR(50),
     memory VARCHAR(50),
-    solution_code TEXT,
+    solution_code TEXT,  -- legacy inline code; new rows use code_hash
+    code_hash VARCHAR(64) REFERENCES code_blobs(hash),
     notes TEXT,
     github_synced BOOLEAN DEFAULT FALSE,
     github_url VARCHAR(500),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    change_xid XID8,  -- writing transaction, for /api/progress/{user_id}/changes (trigger-maintained)
+    has_code BOOLEAN GENERATED ALWAYS AS (code_hash IS NOT NULL OR COALESCE(solution_code, '') <> '') STORED,  -- listings read this instead of the code
     
     UNIQUE(user_id, problem_id, language)  -- Allow multiple solutions per language
 );
@@ -101,12 +118,23 @@ CREATE TABLE roadmaps (
     description TEXT,
     category VARCHAR(50) NOT NULL,  -- 'curated', 'topic', 'company'
     total_problems INTEGER DEFAULT 0,
-    problem_ids INTEGER[],  -- Array of problem IDs for curated roadmaps
+    problem_ids INTEGER[],  -- legacy copy of the membership; read roadmap_problems instead
     difficulty_distribution JSONB,  -- {"easy": 50, "medium": 100, "hard": 50}
     created_at TIMESTAMP DEFAULT NOW(),
     updated_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Ordered roadmap membership (curated sheets and topic roadmaps), written by migrate.py
+-- A roadmap's problems in sheet order are one range scan of the primary key
+CREATE TABLE roadmap_problems (
+    roadmap_id INTEGER NOT NULL REFERENCES roadmaps(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,  -- 1-based order within the roadmap (gaps allowed)
+    problem_id INTEGER NOT NULL REFERENCES problems(problem_id) ON DELETE CASCADE,
+    
+    PRIMARY KEY (roadmap_id, position) INCLUDE (problem_id),
+    UNIQUE (roadmap_id, problem_id)
+);
+
 -- User AI settings
 CREATE TABLE user_ai_settings (
     id SERIAL PRIMARY KEY,
@@ -124,7 +152,8 @@ CREATE TABLE pending_contributions (
     id SERIAL PRIMARY KEY,
     problem_id INTEGER REFERENCES problems(problem_id) ON DELETE CASCADE,
     language VARCHAR(50) NOT NULL,
-    code TEXT NOT NULL,
+    code TEXT,  -- legacy inline code; new rows use code_hash
+    code_hash VARCHAR(64) REFERENCES code_blobs(hash),
     
     -- Contributor info
     contributor_github VARCHAR(100) NOT NULL,
@@ -147,12 +176,17 @@ CREATE INDEX idx_problems_difficulty ON problems(difficulty);
 CREATE INDEX idx_problems_frontend_id ON problems(frontend_id);
 CREATE INDEX idx_solutions_problem_id ON solutions(problem_id);
 CREATE INDEX idx_solutions_language ON solutions(language);
+CREATE INDEX idx_solutions_code_hash ON solutions(code_hash);
 CREATE INDEX idx_user_progress_user_id ON user_progress(user_id);
 CREATE INDEX idx_user_progress_problem_id ON user_progress(problem_id);
 CREATE INDEX idx_user_progress_solved_at ON user_progress(solved_at);
+CREATE INDEX idx_user_progress_code_hash ON user_progress(code_hash);
+CREATE INDEX idx_user_progress_changes ON user_progress(user_id, change_xid);
 CREATE INDEX idx_user_roadmaps_user_id ON user_roadmaps(user_id);
 CREATE INDEX idx_user_roadmaps_active ON user_roadmaps(is_active);
+CREATE INDEX idx_roadmap_problems_problem_id ON roadmap_problems(problem_id);
 CREATE INDEX idx_pending_contributions_status ON pending_contributions(status);
+CREATE INDEX idx_pending_contributions_code_hash ON pending_contributions(code_hash);
 
 -- Functions
 CREATE OR REPLACE FUNCTION update_modified_column()
@@ -174,6 +208,147 @@ CREATE TRIGGER update_solutions_modtime
     FOR EACH ROW
     EXECUTE FUNCTION update_modified_column();
 
+-- Stamp progress rows with the writing transaction for delta sync
+CREATE OR REPLACE FUNCTION track_progress_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    NEW.change_xid = pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER track_user_progress_inserts
+    BEFORE INSERT ON user_progress
+    FOR EACH ROW
+    EXECUTE FUNCTION track_progress_change();
+
+-- Only changes a user can see: moving code into code_blobs (migrate_code_blobs.py)
+-- rewrites code_hash/solution_code alone and must not resurface rows in delta syncs
+CREATE TRIGGER track_user_progress_changes
+    BEFORE UPDATE ON user_progress
+    FOR EACH ROW
+    WHEN ((OLD.user_id, OLD.problem_id, OLD.language, OLD.solved_at, OLD.runtime, OLD.memory,
+           OLD.notes, OLD.github_synced, OLD.github_url)
+          IS DISTINCT FROM
+          (NEW.user_id, NEW.problem_id, NEW.language, NEW.solved_at, NEW.runtime, NEW.memory,
+           NEW.notes, NEW.github_synced, NEW.github_url))
+    EXECUTE FUNCTION track_progress_change();
+
+-- Precomputed counters for /api/stats (see api/counters.py)
+CREATE TABLE stat_counters (
+    name VARCHAR(150) PRIMARY KEY,  -- 'problems', 'solutions', 'solutions.language:<lang>', 'pending_contributions.status:<status>'
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Add deltas to counters; rows are locked in name order so concurrent writers can't deadlock
+CREATE OR REPLACE FUNCTION bump_counters(names TEXT[], deltas BIGINT[])
+RETURNS VOID AS $$
+    INSERT INTO stat_counters (name, value)
+    SELECT name, sum(delta) FROM unnest(names, deltas) AS d(name, delta)
+    GROUP BY name
+    HAVING sum(delta) <> 0
+    ORDER BY name
+    ON CONFLICT (name) DO UPDATE
+        SET value = stat_counters.value + EXCLUDED.value, updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- TRUNCATE skips row triggers: drop the table's counters (prefix match)
+CREATE OR REPLACE FUNCTION reset_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM stat_counters WHERE name = TG_ARGV[0] OR starts_with(name, TG_ARGV[0] || '.');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_problems()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counters(ARRAY['problems'], ARRAY[(SELECT count(*) FROM new_rows)]);
+    ELSE
+        PERFORM bump_counters(ARRAY['problems'], ARRAY[-(SELECT count(*) FROM old_rows)]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_solutions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'solutions' AS k, count(*) AS n FROM new_rows
+            UNION ALL
+            SELECT 'solutions.language:' || language, count(*) FROM new_rows GROUP BY language
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(-n)) FROM (
+            SELECT 'solutions' AS k, count(*) AS n FROM old_rows
+            UNION ALL
+            SELECT 'solutions.language:' || language, count(*) FROM old_rows GROUP BY language
+        ) d;
+    ELSE
+        -- UPDATE: only a language change moves counts
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'solutions.language:' || language AS k, count(*) AS n FROM new_rows GROUP BY language
+            UNION ALL
+            SELECT 'solutions.language:' || language, -count(*) FROM old_rows GROUP BY language
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_pending_contributions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'pending_contributions.status:' || status AS k, count(*) AS n FROM new_rows WHERE status IS NOT NULL GROUP BY status
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(-n)) FROM (
+            SELECT 'pending_contributions.status:' || status AS k, count(*) AS n FROM old_rows WHERE status IS NOT NULL GROUP BY status
+        ) d;
+    ELSE
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'pending_contributions.status:' || status AS k, count(*) AS n FROM new_rows WHERE status IS NOT NULL GROUP BY status
+            UNION ALL
+            SELECT 'pending_contributions.status:' || status, -count(*) FROM old_rows WHERE status IS NOT NULL GROUP BY status
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER count_problems_insert AFTER INSERT ON problems
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_problems();
+CREATE TRIGGER count_problems_delete AFTER DELETE ON problems
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_problems();
+CREATE TRIGGER count_problems_truncate AFTER TRUNCATE ON problems
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_counters('problems');
+
+CREATE TRIGGER count_solutions_insert AFTER INSERT ON solutions
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_solutions();
+CREATE TRIGGER count_solutions_delete AFTER DELETE ON solutions
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_solutions();
+CREATE TRIGGER count_solutions_update AFTER UPDATE ON solutions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_solutions();
+CREATE TRIGGER count_solutions_truncate AFTER TRUNCATE ON solutions
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_counters('solutions');
+
+CREATE TRIGGER count_pending_contributions_insert AFTER INSERT ON pending_contributions
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_pending_contributions();
+CREATE TRIGGER count_pending_contributions_delete AFTER DELETE ON pending_contributions
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_pending_contributions();
+CREATE TRIGGER count_pending_contributions_update AFTER UPDATE ON pending_contributions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_pending_contributions();
+CREATE TRIGGER count_pending_contributions_truncate AFTER TRUNCATE ON pending_contributions
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_counters('pending_contributions');
+
 -- Database metadata
 CREATE TABLE database_metadata (
     key VARCHAR(100) PRIMARY KEY,
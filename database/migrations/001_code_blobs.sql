@@ -0,0 +1,26 @@
+-- Content-addressed, compressed storage for solution code
+-- Existing databases: run this, then `python migrate_code_blobs.py` to move
+-- inline code into code_blobs. Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS code_blobs (
+    hash VARCHAR(64) PRIMARY KEY,  -- SHA-256 of the code
+    codec VARCHAR(10) NOT NULL,    -- 'zlib', 'zstd' or 'none'
+    length INTEGER NOT NULL,       -- characters of code
+    data BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+-- data is already compressed; keep Postgres from trying pglz again
+ALTER TABLE code_blobs ALTER COLUMN data SET STORAGE EXTERNAL;
+
+ALTER TABLE solutions ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64) REFERENCES code_blobs(hash);
+ALTER TABLE solutions ALTER COLUMN code DROP NOT NULL;
+
+ALTER TABLE pending_contributions ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64) REFERENCES code_blobs(hash);
+ALTER TABLE pending_contributions ALTER COLUMN code DROP NOT NULL;
+
+ALTER TABLE user_progress ADD COLUMN IF NOT EXISTS code_hash VARCHAR(64) REFERENCES code_blobs(hash);
+
+CREATE INDEX IF NOT EXISTS idx_solutions_code_hash ON solutions(code_hash);
+CREATE INDEX IF NOT EXISTS idx_user_progress_code_hash ON user_progress(code_hash);
+CREATE INDEX IF NOT EXISTS idx_pending_contributions_code_hash ON pending_contributions(code_hash);
@@ -0,0 +1,133 @@
+-- Precomputed counters for /api/stats (see api/counters.py)
+-- Maintained by statement-level triggers, so bulk loads cost one counter
+-- update per statement rather than one per row. Safe to re-run.
+-- Runs as one transaction: creating the triggers locks the counted tables
+-- against writes until COMMIT, so the seed below can't miss a concurrent insert.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS stat_counters (
+    name VARCHAR(150) PRIMARY KEY,  -- 'problems', 'solutions', 'solutions.language:<lang>', 'pending_contributions.status:<status>'
+    value BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Add deltas to counters; rows are locked in name order so concurrent writers can't deadlock
+CREATE OR REPLACE FUNCTION bump_counters(names TEXT[], deltas BIGINT[])
+RETURNS VOID AS $$
+    INSERT INTO stat_counters (name, value)
+    SELECT name, sum(delta) FROM unnest(names, deltas) AS d(name, delta)
+    GROUP BY name
+    HAVING sum(delta) <> 0
+    ORDER BY name
+    ON CONFLICT (name) DO UPDATE
+        SET value = stat_counters.value + EXCLUDED.value, updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- TRUNCATE skips row triggers: drop the table's counters (prefix match)
+CREATE OR REPLACE FUNCTION reset_counters()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM stat_counters WHERE name = TG_ARGV[0] OR starts_with(name, TG_ARGV[0] || '.');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_problems()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counters(ARRAY['problems'], ARRAY[(SELECT count(*) FROM new_rows)]);
+    ELSE
+        PERFORM bump_counters(ARRAY['problems'], ARRAY[-(SELECT count(*) FROM old_rows)]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_solutions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'solutions' AS k, count(*) AS n FROM new_rows
+            UNION ALL
+            SELECT 'solutions.language:' || language, count(*) FROM new_rows GROUP BY language
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(-n)) FROM (
+            SELECT 'solutions' AS k, count(*) AS n FROM old_rows
+            UNION ALL
+            SELECT 'solutions.language:' || language, count(*) FROM old_rows GROUP BY language
+        ) d;
+    ELSE
+        -- UPDATE: only a language change moves counts
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'solutions.language:' || language AS k, count(*) AS n FROM new_rows GROUP BY language
+            UNION ALL
+            SELECT 'solutions.language:' || language, -count(*) FROM old_rows GROUP BY language
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_pending_contributions()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'pending_contributions.status:' || status AS k, count(*) AS n FROM new_rows WHERE status IS NOT NULL GROUP BY status
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_counters(array_agg(k), array_agg(-n)) FROM (
+            SELECT 'pending_contributions.status:' || status AS k, count(*) AS n FROM old_rows WHERE status IS NOT NULL GROUP BY status
+        ) d;
+    ELSE
+        PERFORM bump_counters(array_agg(k), array_agg(n)) FROM (
+            SELECT 'pending_contributions.status:' || status AS k, count(*) AS n FROM new_rows WHERE status IS NOT NULL GROUP BY status
+            UNION ALL
+            SELECT 'pending_contributions.status:' || status, -count(*) FROM old_rows WHERE status IS NOT NULL GROUP BY status
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER count_problems_insert AFTER INSERT ON problems
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_problems();
+CREATE OR REPLACE TRIGGER count_problems_delete AFTER DELETE ON problems
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_problems();
+CREATE OR REPLACE TRIGGER count_problems_truncate AFTER TRUNCATE ON problems
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_counters('problems');
+
+CREATE OR REPLACE TRIGGER count_solutions_insert AFTER INSERT ON solutions
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_solutions();
+CREATE OR REPLACE TRIGGER count_solutions_delete AFTER DELETE ON solutions
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_solutions();
+CREATE OR REPLACE TRIGGER count_solutions_update AFTER UPDATE ON solutions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_solutions();
+CREATE OR REPLACE TRIGGER count_solutions_truncate AFTER TRUNCATE ON solutions
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_counters('solutions');
+
+CREATE OR REPLACE TRIGGER count_pending_contributions_insert AFTER INSERT ON pending_contributions
+    REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_pending_contributions();
+CREATE OR REPLACE TRIGGER count_pending_contributions_delete AFTER DELETE ON pending_contributions
+    REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION count_pending_contributions();
+CREATE OR REPLACE TRIGGER count_pending_contributions_update AFTER UPDATE ON pending_contributions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION count_pending_contributions();
+CREATE OR REPLACE TRIGGER count_pending_contributions_truncate AFTER TRUNCATE ON pending_contributions
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_counters('pending_contributions');
+
+-- Seed from existing rows (writers are blocked by the trigger locks until COMMIT)
+INSERT INTO stat_counters (name, value)
+SELECT 'problems', count(*) FROM problems
+UNION ALL
+SELECT 'solutions', count(*) FROM solutions
+UNION ALL
+SELECT 'solutions.language:' || language, count(*) FROM solutions GROUP BY language
+UNION ALL
+SELECT 'pending_contributions.status:' || status, count(*) FROM pending_contributions WHERE status IS NOT NULL GROUP BY status
+ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value, updated_at = NOW();
+
+COMMIT;
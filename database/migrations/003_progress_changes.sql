@@ -0,0 +1,38 @@
+-- Delta sync for user progress (GET /api/progress/{user_id}/changes)
+-- Every insert, and every update of a column a user sees, stamps the row with
+-- its transaction id; clients pass back the snapshot xmin they were given and
+-- receive rows written since. Safe to re-run.
+
+ALTER TABLE user_progress ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW();
+ALTER TABLE user_progress ADD COLUMN IF NOT EXISTS change_xid XID8;
+
+CREATE OR REPLACE FUNCTION track_progress_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = NOW();
+    NEW.change_xid = pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER track_user_progress_inserts
+    BEFORE INSERT ON user_progress
+    FOR EACH ROW
+    EXECUTE FUNCTION track_progress_change();
+
+-- Only changes a user can see: moving code into code_blobs (migrate_code_blobs.py)
+-- rewrites code_hash/solution_code alone and must not resurface rows in delta syncs
+CREATE OR REPLACE TRIGGER track_user_progress_changes
+    BEFORE UPDATE ON user_progress
+    FOR EACH ROW
+    WHEN ((OLD.user_id, OLD.problem_id, OLD.language, OLD.solved_at, OLD.runtime, OLD.memory,
+           OLD.notes, OLD.github_synced, OLD.github_url)
+          IS DISTINCT FROM
+          (NEW.user_id, NEW.problem_id, NEW.language, NEW.solved_at, NEW.runtime, NEW.memory,
+           NEW.notes, NEW.github_synced, NEW.github_url))
+    EXECUTE FUNCTION track_progress_change();
+
+-- Stamp existing rows
+UPDATE user_progress SET updated_at = NOW(), change_xid = pg_current_xact_id() WHERE change_xid IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_user_progress_changes ON user_progress(user_id, change_xid);
@@ -0,0 +1,7 @@
+-- Stored has_code flag for user progress listings
+-- Progress listings report whether a solution has code; reading it from this
+-- column keeps them from detoasting legacy inline code (or joining code_blobs).
+-- Adding a stored generated column rewrites user_progress once. Safe to re-run.
+
+ALTER TABLE user_progress ADD COLUMN IF NOT EXISTS has_code BOOLEAN
+    GENERATED ALWAYS AS (code_hash IS NOT NULL OR COALESCE(solution_code, '') <> '') STORED;
@@ -0,0 +1,61 @@
+-- Ordered roadmap membership (see routers/roadmaps.py)
+-- Replaces reads of roadmaps.problem_ids and topic-name guessing: every roadmap,
+-- curated or per topic, is a roadmaps row whose problems are listed in
+-- roadmap_problems in sheet order. Existing arrays keep their order; topic
+-- roadmaps are created from problem_topics (ordered by problem id). migrate.py
+-- rewrites the membership on each run. Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS roadmap_problems (
+    roadmap_id INTEGER NOT NULL REFERENCES roadmaps(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,  -- 1-based order within the roadmap (gaps allowed)
+    problem_id INTEGER NOT NULL REFERENCES problems(problem_id) ON DELETE CASCADE,
+    
+    PRIMARY KEY (roadmap_id, position) INCLUDE (problem_id),
+    UNIQUE (roadmap_id, problem_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_roadmap_problems_problem_id ON roadmap_problems(problem_id);
+
+-- Curated roadmaps: array order becomes position (first occurrence wins, unknown problems skipped)
+INSERT INTO roadmap_problems (roadmap_id, position, problem_id)
+SELECT r.id, member.position, member.problem_id
+FROM roadmaps r
+CROSS JOIN LATERAL unnest(r.problem_ids) WITH ORDINALITY AS member(problem_id, position)
+WHERE EXISTS (SELECT 1 FROM problems p WHERE p.problem_id = member.problem_id)
+  AND NOT EXISTS (SELECT 1 FROM roadmap_problems rp WHERE rp.roadmap_id = r.id)
+ORDER BY r.id, member.position
+ON CONFLICT DO NOTHING;
+
+-- One roadmap per topic, named like GET /api/roadmaps lists them
+INSERT INTO roadmaps (name, display_name, description, category)
+SELECT 'topic_' || replace(t.name, ' ', '_'), t.name || ' Mastery',
+       'Master ' || t.name || ' from basics to advanced', 'topic'
+FROM topics t
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO roadmap_problems (roadmap_id, position, problem_id)
+SELECT r.id, row_number() OVER (PARTITION BY r.id ORDER BY pt.problem_id), pt.problem_id
+FROM topics t
+JOIN roadmaps r ON r.name = 'topic_' || replace(t.name, ' ', '_')
+JOIN problem_topics pt ON pt.topic_id = t.id
+WHERE NOT EXISTS (SELECT 1 FROM roadmap_problems rp WHERE rp.roadmap_id = r.id)
+ON CONFLICT DO NOTHING;
+
+-- Totals and difficulty mix from the membership
+UPDATE roadmaps r SET
+    total_problems = stats.total,
+    difficulty_distribution = stats.distribution,
+    updated_at = NOW()
+FROM (
+    SELECT roadmap_id, sum(count)::INTEGER AS total, jsonb_object_agg(difficulty, count) AS distribution
+    FROM (
+        SELECT rp.roadmap_id, p.difficulty, count(*) AS count
+        FROM roadmap_problems rp JOIN problems p ON p.problem_id = rp.problem_id
+        GROUP BY rp.roadmap_id, p.difficulty
+    ) per_difficulty
+    GROUP BY roadmap_id
+) stats
+WHERE r.id = stats.roadmap_id;
+
+-- New catalog version, so API workers reload their roadmap snapshot
+UPDATE database_metadata SET value = NOW()::TEXT, updated_at = NOW() WHERE key = 'last_sync';
@@ -77,6 +77,12 @@ async function handleSuccessfulSubmission(submissionData) {
         const result = await response.json();
         console.log('✓ Saved to database:', result);
         
+        // Sent back on progress reads so they see this save even with read replicas
+        const lastWrite = response.headers.get('X-Last-Write');
+        if (lastWrite) {
+            await chrome.storage.local.set({ lastWrite });
+        }
+        
         showNotification('✓ Solution saved to database!');
         
         // Sync to GitHub if enabled
@@ -87,13 +93,13 @@ async function handleSuccessfulSubmission(submissionData) {
                     if (response && response.success) {
                         showNotification('✓ Synced to GitHub!');
                         
-                        // Update database with GitHub sync status
-                        fetch(`${API_BASE}/api/progress/${result.progress_id}/github-sync`, {
-                            method: 'PATCH',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({ 
-                                github_url: response.result.url
-                            })
+                        // Update database with GitHub sync status (by user/problem/language:
+                        // a queued save is acknowledged without a progress_id)
+                        const solutionPath = [solutionData.user_id, solutionData.problem_id, solutionData.language]
+                            .map(encodeURIComponent).join('/');
+                        const githubUrl = encodeURIComponent(response.result.url);
+                        fetch(`${API_BASE}/api/progress/${solutionPath}/github-sync?github_url=${githubUrl}`, {
+                            method: 'PATCH'
                         });
                     }
                 }
@@ -558,18 +558,15 @@ async function loadProblemView(data) {
 }
 
 async function findProblemIdAndLoadSolutions(userId, slug) {
-    // Search for problem by slug in the problems list
+    // Resolve problem_id from the slug index
     try {
-        const response = await fetch(`${API_URL}/api/problems?limit=2000`);
+        const response = await fetch(`${API_URL}/api/problems/by-slug/${encodeURIComponent(slug)}`);
         if (response.ok) {
-            const problems = await response.json();
-            const problem = problems.find(p => p.title_slug === slug);
-            if (problem) {
-                currentProblemData.problem_id = problem.problem_id;
-                loadSolutions(userId, problem.problem_id);
-            } else {
-                document.getElementById('solutionsList').innerHTML = '<p>Problem not found in database.</p>';
-            }
+            const problem = await response.json();
+            currentProblemData.problem_id = problem.problem_id;
+            loadSolutions(userId, problem.problem_id);
+        } else if (response.status === 404) {
+            document.getElementById('solutionsList').innerHTML = '<p>Problem not found in database.</p>';
         }
     } catch (error) {
         console.error('Error finding problem:', error);
@@ -613,10 +610,18 @@ function displayProblemDetails(problem) {
     };
 }
 
+// Token from the last save (see detector.js): reads sent with it skip lagging read replicas
+async function readAfterWriteHeaders() {
+    const { lastWrite } = await chrome.storage.local.get(['lastWrite']);
+    return lastWrite ? { 'X-Last-Write': lastWrite } : {};
+}
+
 async function loadSolutions(userId, problemId) {
     try {
         // Get solutions using problem_id
-        const response = await fetch(`${API_URL}/api/progress/${userId}/${problemId}`);
+        const response = await fetch(`${API_URL}/api/progress/${userId}/${problemId}`, {
+            headers: await readAfterWriteHeaders()
+        });
         if (response.ok) {
             const data = await response.json();
             const solutions = data.solutions || [];
@@ -719,7 +724,9 @@ function displaySolutionsList(solutions, userId, problemId) {
             if (codeDiv.style.display === 'none') {
                 // Fetch and show code
                 try {
-                    const response = await fetch(`${API_URL}/api/progress/${userId}/${problemId}/${language}/code`);
+                    const response = await fetch(`${API_URL}/api/progress/${userId}/${problemId}/${language}/code`, {
+                        headers: await readAfterWriteHeaders()
+                    });
                     const data = await response.json();
                     codeDiv.innerHTML = `<pre><code>${escapeHtml(data.code)}</code></pre>`;
                     codeDiv.style.display = 'block';
@@ -6,7 +6,7 @@ Run this once after starting Docker containers
 
 import json
 import sys
-from sqlalchemy import create_engine, text, func
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
 import os
@@ -14,8 +14,10 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from api.models import Base, Problem, Solution, Topic, Company, Roadmap
+from api.models import Base, Problem, Solution, Topic, Company, Roadmap, problem_topics
 from api.database import DATABASE_URL
+from api.code_store import put_code
+from api.roadmap_store import save_roadmap, topic_roadmap_name
 
 
 def load_json_database(file_path: str) -> dict:
@@ -44,12 +46,13 @@ def migrate_database(json_file: str, database_url: str):
         # Track unique topics and companies
         topics_dict = {}
         companies_dict = {}
+        # Roadmap membership in sheet order (order of appearance in the JSON)
         roadmap_problems = {
-            'leadcoding_by_fraz_250_qs_dsa_sheet': set(),
-            'arsh_goyal_280_qs_dsa_sheet': set(),
-            'strivers': set(),
-            'NeetCode': set(),
-            'Interview_DS_Algo': set()
+            'leadcoding_by_fraz_250_qs_dsa_sheet': [],
+            'arsh_goyal_280_qs_dsa_sheet': [],
+            'strivers': [],
+            'NeetCode': [],
+            'Interview_DS_Algo': []
         }
         
         # Load existing topics and companies into cache
@@ -66,6 +69,22 @@ def migrate_database(json_file: str, database_url: str):
             if idx % 100 == 0:
                 print(f"   Processed {idx}/{len(data['problems'])} problems...")
             
+            # Track roadmap memberships (for existing problems too: roadmaps are rebuilt every run)
+            roadmaps_data = problem_data.get('roadmaps', {})
+            for sheet in ('leadcoding_by_fraz_250_qs_dsa_sheet', 'arsh_goyal_280_qs_dsa_sheet', 'strivers'):
+                if sheet in roadmaps_data:
+                    roadmap_problems[sheet].append(problem_data['id'])
+            solutions_data = problem_data.get('solutions', {})
+            if isinstance(solutions_data, dict):
+                sources = {
+                    solution_data.get('source', 'community')
+                    for lang_solutions in solutions_data.values() for solution_data in lang_solutions
+                }
+                # NeetCode and Interview_DS_Algo membership comes from solution sources
+                for source in ('NeetCode', 'Interview_DS_Algo'):
+                    if source in sources:
+                        roadmap_problems[source].append(problem_data['id'])
+            
             # Skip if problem already exists
             existing_problem = db.query(Problem).filter_by(problem_id=problem_data['id']).first()
             if existing_problem:
@@ -104,33 +123,17 @@ def migrate_database(json_file: str, database_url: str):
             db.add(problem)
             db.flush()  # Ensure problem is saved before adding solutions
             
-            # Track roadmap memberships
-            roadmaps_data = problem_data.get('roadmaps', {})
-            if 'leadcoding_by_fraz_250_qs_dsa_sheet' in roadmaps_data:
-                roadmap_problems['leadcoding_by_fraz_250_qs_dsa_sheet'].add(problem_data['id'])
-            if 'arsh_goyal_280_qs_dsa_sheet' in roadmaps_data:
-                roadmap_problems['arsh_goyal_280_qs_dsa_sheet'].add(problem_data['id'])
-            if 'strivers' in roadmaps_data:
-                roadmap_problems['strivers'].add(problem_data['id'])
-            
-            # Add solutions and track roadmap sources
-            solutions_data = problem_data.get('solutions', {})
+            # Add solutions
             if isinstance(solutions_data, dict):
                 # Solutions are organized by language
                 for language, lang_solutions in solutions_data.items():
                     for solution_data in lang_solutions:
                         source = solution_data.get('source', 'community')
                         
-                        # Track NeetCode and Interview_DS_Algo roadmap membership
-                        if source == 'NeetCode':
-                            roadmap_problems['NeetCode'].add(problem_data['id'])
-                        elif source == 'Interview_DS_Algo':
-                            roadmap_problems['Interview_DS_Algo'].add(problem_data['id'])
-                        
                         solution = Solution(
                             problem_id=problem_data['id'],
                             language=language,
-                            code=solution_data['code'],
+                            code_hash=put_code(db, solution_data['code']),
                             source=source,
                             contributed_at=datetime.now()
                         )
@@ -140,9 +143,8 @@ def migrate_database(json_file: str, database_url: str):
         print("\n💾 Committing to database...")
         db.commit()
         
-        # Insert curated roadmaps metadata
+        # Curated roadmaps (created or updated, membership replaced)
         print("\n📚 Creating curated roadmaps...")
-        from api.models import Roadmap
         
         roadmaps_to_insert = [
             {
@@ -150,57 +152,60 @@ def migrate_database(json_file: str, database_url: str):
                 'display_name': 'LeadCoding by Fraz (250 Questions)',
                 'description': 'Curated DSA sheet by Fraz covering essential interview problems',
                 'category': 'curated',
-                'total_problems': len(roadmap_problems['leadcoding_by_fraz_250_qs_dsa_sheet']),
-                'problem_ids': list(roadmap_problems['leadcoding_by_fraz_250_qs_dsa_sheet'])
+                'problem_ids': roadmap_problems['leadcoding_by_fraz_250_qs_dsa_sheet']
             },
             {
                 'name': 'Arsh',
                 'display_name': 'Arsh Goyal DSA Sheet (280 Questions)',
                 'description': 'Comprehensive DSA preparation sheet by Arsh Goyal',
                 'category': 'curated',
-                'total_problems': len(roadmap_problems['arsh_goyal_280_qs_dsa_sheet']),
-                'problem_ids': list(roadmap_problems['arsh_goyal_280_qs_dsa_sheet'])
+                'problem_ids': roadmap_problems['arsh_goyal_280_qs_dsa_sheet']
             },
             {
                 'name': 'Strivers',
                 'display_name': "Striver's SDE Sheet",
                 'description': 'Popular SDE interview preparation roadmap by Striver',
                 'category': 'curated',
-                'total_problems': len(roadmap_problems['strivers']),
-                'problem_ids': list(roadmap_problems['strivers'])
+                'problem_ids': roadmap_problems['strivers']
             },
             {
                 'name': 'NeetCode',
                 'display_name': 'NeetCode 150',
                 'description': 'Popular coding pattern problems from NeetCode covering all major topics',
                 'category': 'curated',
-                'total_problems': len(roadmap_problems['NeetCode']),
-                'problem_ids': list(roadmap_problems['NeetCode'])
+                'problem_ids': roadmap_problems['NeetCode']
             },
             {
                 'name': 'Interview_DS_Algo',
                 'display_name': 'Interview DS & Algorithms',
                 'description': 'Comprehensive collection of data structures and algorithms interview problems',
                 'category': 'curated',
-                'total_problems': len(roadmap_problems['Interview_DS_Algo']),
-                'problem_ids': list(roadmap_problems['Interview_DS_Algo'])
+                'problem_ids': roadmap_problems['Interview_DS_Algo']
             }
         ]
         
         for roadmap_data in roadmaps_to_insert:
-            # Calculate difficulty distribution
-            problem_ids = roadmap_data['problem_ids']
-            difficulties = db.query(Problem.difficulty, func.count(Problem.id)).filter(
-                Problem.problem_id.in_(problem_ids)
-            ).group_by(Problem.difficulty).all()
-            
-            difficulty_dist = {diff: count for diff, count in difficulties}
-            roadmap_data['difficulty_distribution'] = difficulty_dist
-            
-            roadmap = Roadmap(**roadmap_data)
-            db.add(roadmap)
-            
-            print(f"   ✅ {roadmap_data['name']}: {roadmap_data['total_problems']} problems")
+            roadmap = save_roadmap(db, **roadmap_data)
+            print(f"   ✅ {roadmap.name}: {roadmap.total_problems} problems")
+        
+        # Topic roadmaps: every topic, problems in problem_id order
+        print("\n📚 Creating topic roadmaps...")
+        for topic in db.query(Topic).order_by(Topic.name):
+            problem_ids = [
+                problem_id for (problem_id,) in
+                db.query(problem_topics.c.problem_id)
+                .filter(problem_topics.c.topic_id == topic.id)
+                .order_by(problem_topics.c.problem_id)
+            ]
+            save_roadmap(
+                db,
+                name=topic_roadmap_name(topic.name),
+                display_name=f"{topic.name} Mastery",
+                description=f"Master {topic.name} from basics to advanced",
+                category='topic',
+                problem_ids=problem_ids
+            )
+        print(f"   ✅ {db.query(Roadmap).filter(Roadmap.category == 'topic').count()} topic roadmaps")
         
         db.commit()
         
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Move inline solution code into code_blobs
+Run database/migrations/001_code_blobs.sql first. Rows are converted in
+batches (code -> code_hash, inline column set to NULL), so the API keeps
+serving throughout; re-running only picks up rows that are still inline.
+Prints table sizes before and after.
+"""
+
+import argparse
+import os
+import sys
+from sqlalchemy import create_engine, text, select, update, bindparam
+from sqlalchemy.orm import sessionmaker
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.models import Solution, PendingContribution, UserProgress
+from api.database import DATABASE_URL
+from api.code_store import put_codes
+
+# (model, inline code column) for every table that references code_blobs
+CODE_TABLES = [
+    (Solution, "code"),
+    (PendingContribution, "code"),
+    (UserProgress, "solution_code"),
+]
+
+SIZED_TABLES = ["solutions", "pending_contributions", "user_progress", "code_blobs"]
+
+
+def table_sizes(db) -> dict:
+    """{table: (heap, toast, indexes, total)} in bytes"""
+    sizes = {}
+    for table in SIZED_TABLES:
+        row = db.execute(text("""
+            SELECT pg_relation_size(c.oid),
+                   COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0),
+                   pg_indexes_size(c.oid),
+                   pg_total_relation_size(c.oid)
+            FROM pg_class c WHERE c.oid = to_regclass(:table)
+        """), {"table": table}).first()
+        if row:
+            sizes[table] = tuple(row)
+    return sizes
+
+
+def print_sizes(label: str, sizes: dict):
+    print(f"\n📏 {label}")
+    print(f"   {'table':<24}{'heap':>12}{'toast':>12}{'indexes':>12}{'total':>12}")
+    for table, (heap, toast, indexes, total) in sizes.items():
+        print(f"   {table:<24}{heap:>12,}{toast:>12,}{indexes:>12,}{total:>12,}")
+    print(f"   {'all':<24}{'':>36}{sum(s[3] for s in sizes.values()):>12,}")
+
+
+def backfill_table(db, model, column: str, batch_size: int) -> int:
+    """Convert one table's inline code to blob references; returns rows converted"""
+    table = model.__table__
+    inline = table.c[column]
+    # Only rows still holding the code that was hashed: a concurrent save may
+    # have replaced it (or already set code_hash) since the batch was read
+    statement = (
+        update(table)
+        .where(
+            table.c.id == bindparam("row_id"),
+            table.c.code_hash.is_(None),
+            inline == bindparam("old_code")
+        )
+        .values({"code_hash": bindparam("blob_hash"), column: None})
+    )
+
+    converted = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, inline)
+            .where(table.c.id > last_id, table.c.code_hash.is_(None), inline != "")
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        hashes = put_codes(db, [row[1] for row in rows])
+        db.execute(statement, [
+            {"row_id": row[0], "old_code": row[1], "blob_hash": blob_hash}
+            for row, blob_hash in zip(rows, hashes)
+        ])
+        db.commit()
+        converted += len(rows)
+        last_id = rows[-1][0]
+        print(f"   {table.name}: {converted} rows converted...")
+    return converted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move inline solution code into code_blobs")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--vacuum-full", action="store_true",
+        help="VACUUM FULL the tables afterwards so the size report reflects reclaimed space (takes locks)"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(os.getenv("DATABASE_URL", DATABASE_URL))
+    db = sessionmaker(bind=engine)()
+
+    try:
+        before = table_sizes(db)
+        print_sizes("Before", before)
+
+        print("\n🚚 Moving code into code_blobs...")
+        for model, column in CODE_TABLES:
+            converted = backfill_table(db, model, column, args.batch_size)
+            print(f"   ✅ {model.__tablename__}: {converted} rows")
+
+        blobs = db.execute(text("SELECT count(*) FROM code_blobs")).scalar()
+        print(f"\n📦 {blobs} distinct code blobs")
+
+        if args.vacuum_full:
+            print("\n🧹 VACUUM FULL...")
+            db.close()
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                for table in SIZED_TABLES:
+                    conn.execute(text(f"VACUUM FULL ANALYZE {table}"))
+            db = sessionmaker(bind=engine)()
+
+        after = table_sizes(db)
+        print_sizes("After" if args.vacuum_full else "After (run with --vacuum-full to reclaim dead space)", after)
+    except Exception as e:
+        print(f"\n❌ Error during code migration: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Shared helpers for the scripts/bench_*.py benchmarks
+The API reads its settings (DB_MODE, FAST_JSON_RESPONSES, ...) at import, so a
+benchmark comparing settings re-runs itself once per variant in a fresh
+process; the child measures in-process through the ASGI app (no network,
+no uvicorn), against the database in DATABASE_URL.
+"""
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api")
+VARIANT_ENV = "BENCH_VARIANT"
+
+
+def load_app():
+    """The FastAPI app, imported with the current environment"""
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import main
+    return main.app
+
+
+def current_variant() -> str:
+    """Label of the variant this process measures ("" in the parent)"""
+    return os.environ.get(VARIANT_ENV, "")
+
+
+def run_variants(variants: Dict[str, Dict[str, str]]):
+    """Re-run this script once per {label: environment overrides}"""
+    for label, env in variants.items():
+        subprocess.run(
+            [sys.executable, *sys.argv],
+            env={**os.environ, **env, VARIANT_ENV: label},
+            check=True
+        )
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def latency_summary(samples: List[float]) -> str:
+    """p50/p99 of samples given in seconds"""
+    return f"p50 {percentile(samples, 0.5) * 1000:.1f} ms, p99 {percentile(samples, 0.99) * 1000:.1f} ms"
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Sustained throughput and latency with DB_MODE=sync vs DB_MODE=async
+Fires --requests requests at --concurrency in flight over a mix of problem,
+solution, progress and AI-settings reads (plus progress saves with --writes),
+in-process through the ASGI app. Each mode runs in its own process.
+
+    DATABASE_URL=postgresql://... python scripts/bench_async.py --requests 3000 --concurrency 64
+
+In-process numbers leave out HTTP parsing; for end-to-end figures run uvicorn
+with each DB_MODE and point a load generator at it.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _bench import current_variant, latency_summary, load_app, run_variants
+
+USER = "bench-async"
+
+
+def urls(problem_ids):
+    for problem_id in problem_ids:
+        yield "GET", f"/api/problems/{problem_id}"
+        yield "GET", f"/api/solutions/{problem_id}"
+        yield "GET", f"/api/progress/{USER}/{problem_id}"
+        yield "GET", f"/api/ai-settings/{USER}"
+
+
+async def measure(requests: int, concurrency: int, writes: bool):
+    import httpx
+    from sqlalchemy import text
+
+    app = load_app()
+    from database import engine
+
+    with engine.connect() as connection:
+        problem_ids = connection.execute(text("SELECT problem_id FROM problems ORDER BY problem_id LIMIT 50")).scalars().all()
+    mix = list(urls(problem_ids))
+    if writes:
+        mix += [("POST", problem_id) for problem_id in problem_ids]
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+
+        async def one(i: int, record: bool):
+            nonlocal errors
+            method, target = mix[i % len(mix)]
+            async with semaphore:
+                started = time.perf_counter()
+                if method == "POST":
+                    response = await client.post("/api/progress/save", json={
+                        "user_id": USER, "problem_id": target, "language": "python", "solution_code": f"# {i}"
+                    })
+                else:
+                    response = await client.get(target)
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                    errors += response.status_code >= 500
+
+        await asyncio.gather(*(one(i, False) for i in range(min(requests, 200))))  # warm pools and caches
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, True) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"   {current_variant():<6} {requests / elapsed:>8.0f} req/s   {latency_summary(latencies)}   5xx {errors}")
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM user_progress WHERE user_id = :user"), {"user": USER})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DB_MODE=sync and DB_MODE=async under load")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--writes", action="store_true", help="Mix in progress saves")
+    args = parser.parse_args()
+
+    if current_variant():
+        asyncio.run(measure(args.requests, args.concurrency, args.writes))
+        return
+    print(f"\n⏱️  {args.requests} requests, {args.concurrency} in flight")
+    run_variants({"sync": {"DB_MODE": "sync"}, "async": {"DB_MODE": "async"}})
+
+
+if __name__ == "__main__":
+    main()
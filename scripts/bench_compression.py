@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Response size and serialization cost of the catalog endpoints
+For each URL: body size per Content-Encoding (identity, gzip, br, zstd as
+available), then mean request time with FAST_JSON_RESPONSES on and off
+(uncompressed, so only serialization differs). Also checks both modes
+return the same JSON.
+
+    DATABASE_URL=postgresql://... python scripts/bench_compression.py --requests 50
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _bench import current_variant, load_app, run_variants
+
+URLS = [
+    "/api/problems?limit=200",
+    "/api/problems?limit=200&fields=summary",
+    "/api/solutions/1",
+    "/api/roadmaps",
+]
+ENCODINGS = ["identity", "gzip", "br", "zstd"]
+
+
+def measure(requests: int):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(load_app())
+    variant = current_variant()
+    for url in URLS:
+        response = client.get(url, headers={"accept-encoding": "identity"})
+        response.raise_for_status()
+        started = time.perf_counter()
+        for _ in range(requests):
+            client.get(url, headers={"accept-encoding": "identity"})
+        elapsed = (time.perf_counter() - started) / requests
+        digest = hashlib.sha1(json.dumps(response.json(), sort_keys=True).encode()).hexdigest()[:12]
+        print(f"   {variant:<10}{url:<44}{elapsed * 1000:>9.2f} ms   body {digest}")
+
+    if variant == "fast":
+        print("\n📦 Bytes on the wire per Content-Encoding")
+        print(f"   {'url':<44}" + "".join(f"{encoding:>10}" for encoding in ENCODINGS))
+        for url in URLS:
+            sizes = []
+            for encoding in ENCODINGS:
+                response = client.get(url, headers={"accept-encoding": encoding})
+                applied = response.headers.get("content-encoding", "identity")
+                # httpx decodes the body; the wire size is the Content-Length
+                size = response.headers.get("content-length") if applied == encoding else None
+                sizes.append(f"{int(size):>10,}" if size else f"{'-':>10}")
+            print(f"   {url:<44}" + "".join(sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression and fast JSON serialization")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per URL and mode")
+    args = parser.parse_args()
+
+    if current_variant():
+        measure(args.requests)
+        return
+    print("\n⏱️  Mean request time (identical body digests mean identical JSON)")
+    run_variants({
+        "validated": {"FAST_JSON_RESPONSES": "false"},
+        "fast": {"FAST_JSON_RESPONSES": "true"},
+    })
+
+
+if __name__ == "__main__":
+    main()
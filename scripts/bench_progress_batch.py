@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Progress ingestion throughput: POST /api/progress/save one at a time vs
+POST /api/progress/batch, for the same submissions (distinct users/problems,
+~300 bytes of code each), in-process through the ASGI app.
+
+    DATABASE_URL=postgresql://... python scripts/bench_progress_batch.py --items 500
+    DATABASE_URL=postgresql://... DB_MODE=async python scripts/bench_progress_batch.py
+
+The batch is split into requests of --batch-size items (the endpoint then
+writes PROGRESS_BATCH_CHUNK_SIZE per upsert). Rows are deleted afterwards.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _bench import load_app
+
+USER_PREFIX = "bench-batch-"
+
+
+def submissions(problem_ids, count: int, language: str):
+    return [
+        {
+            "user_id": f"{USER_PREFIX}{i % 25}",
+            "problem_id": problem_ids[i % len(problem_ids)],
+            "language": language,
+            "solution_code": f"solution {i}\n" * 20,
+            "runtime": "3 ms",
+            "github_synced": i % 2 == 0
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark single vs batch progress saves")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=500, help="Items per /batch request")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    app = load_app()
+    from database import engine
+
+    with engine.connect() as connection:
+        problem_ids = connection.execute(text("SELECT problem_id FROM problems ORDER BY problem_id LIMIT 300")).scalars().all()
+
+    # One event loop for every request (async engines are bound to the loop they connected on)
+    try:
+        with TestClient(app) as client:
+            single = submissions(problem_ids, args.items, "python")
+            started = time.perf_counter()
+            for item in single:
+                response = client.post("/api/progress/save", json=item)
+                assert response.status_code in (200, 202), response.text
+            single_seconds = time.perf_counter() - started
+
+            batch = submissions(problem_ids, args.items, "java")
+            started = time.perf_counter()
+            failed = 0
+            for start in range(0, len(batch), args.batch_size):
+                response = client.post("/api/progress/batch", json={"items": batch[start:start + args.batch_size]})
+                assert response.status_code == 200, response.text
+                failed += response.json()["failed"]
+            batch_seconds = time.perf_counter() - started
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text("DELETE FROM user_progress WHERE user_id LIKE :prefix"), {"prefix": f"{USER_PREFIX}%"}
+            )
+
+    print(f"\n⏱️  {args.items} submissions ({os.getenv('DB_MODE', 'sync')} mode)")
+    print(f"   /save one at a time: {single_seconds:7.2f} s  {args.items / single_seconds:8.0f} items/s")
+    print(f"   /batch ({args.batch_size}/request): {batch_seconds:7.2f} s  {args.items / batch_seconds:8.0f} items/s"
+          f"  ({single_seconds / batch_seconds:.0f}x, {failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Progress listing reads for a user with thousands of long solutions
+Seeds one user with --problems problems x --languages languages of --code-kb
+KB of code (stored inline, like rows written before the blob store) and 1 KB
+of notes each, then times the reads that list that progress without needing
+the code: per-problem progress, roadmap problems with completion, /changes.
+In-process through the ASGI app; the user's rows are deleted afterwards.
+
+    DATABASE_URL=postgresql://... python scripts/bench_progress_reads.py
+    DATABASE_URL=postgresql://... DB_MODE=async python scripts/bench_progress_reads.py --problems 500
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _bench import latency_summary, load_app
+
+USER = "bench-reads"
+LANGUAGES = ["python", "cpp", "java", "go", "rust", "c", "javascript", "typescript", "kotlin", "swift", "csharp", "ruby"]
+
+
+def seed(engine, problems: int, languages: int, code_kb: int):
+    """Insert the user's rows; returns (problem ids, roadmap name)"""
+    from sqlalchemy import text
+
+    random.seed(24)
+    with engine.begin() as connection:
+        # Solve the problems of the largest roadmap first, so completion lookups find them
+        roadmap = connection.execute(text(
+            "SELECT r.name FROM roadmaps r JOIN roadmap_problems rp ON rp.roadmap_id = r.id "
+            "GROUP BY r.name ORDER BY count(*) DESC LIMIT 1"
+        )).scalar()
+        problem_ids = connection.execute(text(
+            "SELECT p.problem_id FROM problems p "
+            "LEFT JOIN roadmap_problems rp ON rp.problem_id = p.problem_id "
+            "AND rp.roadmap_id = (SELECT id FROM roadmaps WHERE name = :roadmap) "
+            "ORDER BY rp.position NULLS LAST, p.problem_id LIMIT :limit"
+        ), {"roadmap": roadmap, "limit": problems}).scalars().all()
+
+        connection.execute(text("DELETE FROM user_progress WHERE user_id = :user"), {"user": USER})
+        for problem_id in problem_ids:
+            connection.execute(text(
+                "INSERT INTO user_progress (user_id, problem_id, language, solution_code, notes, runtime, memory) "
+                "VALUES (:user, :problem_id, :language, :code, :notes, '3 ms', '16.2 MB')"
+            ), [{
+                "user": USER,
+                "problem_id": problem_id,
+                "language": language,
+                "code": "".join(random.choices(string.ascii_letters + " \n", k=code_kb * 1024)),
+                "notes": "".join(random.choices(string.ascii_letters + " ", k=1024))
+            } for language in LANGUAGES[:languages]])
+        connection.execute(text("ANALYZE user_progress"))
+        size = connection.execute(text("SELECT pg_size_pretty(pg_total_relation_size('user_progress'))")).scalar()
+    print(f"📦 {len(problem_ids) * languages:,} rows for {USER} ({len(problem_ids)} problems x {languages} languages, "
+          f"{code_kb} KB code each), user_progress is {size}")
+    return problem_ids, roadmap
+
+
+def measure(client, label: str, urls, rounds: int):
+    for url in urls[:3]:
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.text)
+    latencies = []
+    for _ in range(rounds):
+        for url in urls:
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - started)
+    print(f"   {label:<50}{latency_summary(latencies)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark progress listing reads for a user with large solutions")
+    parser.add_argument("--problems", type=int, default=300)
+    parser.add_argument("--languages", type=int, default=10, choices=range(1, len(LANGUAGES) + 1), metavar="1-12")
+    parser.add_argument("--code-kb", type=int, default=16, help="Size of each solution")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+
+    app = load_app()
+    from database import engine
+
+    problem_ids, roadmap = seed(engine, args.problems, args.languages, args.code_kb)
+    # One event loop for every request (async engines are bound to the loop they connected on)
+    try:
+        with TestClient(app) as client:
+            print(f"\n⏱️  Reads ({os.getenv('DB_MODE', 'sync')} mode)")
+            measure(client, "GET /api/progress/{user}/{problem_id}",
+                    [f"/api/progress/{USER}/{problem_id}" for problem_id in problem_ids], args.rounds)
+            if roadmap:
+                measure(client, "GET /api/roadmaps/{roadmap}/problems?user_id=",
+                        [f"/api/roadmaps/{roadmap}/problems?user_id={USER}"] * 20, args.rounds)
+            measure(client, "GET /api/progress/{user}/changes", [f"/api/progress/{USER}/changes"] * 10, args.rounds)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM user_progress WHERE user_id = :user"), {"user": USER})
+
+
+if __name__ == "__main__":
+    main()
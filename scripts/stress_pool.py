@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Connection pool exhaustion stress test
+Occupies every connection of the primary pool with pg_sleep, fires a burst of
+requests at endpoints that need the database (progress save/batch/read, health),
+then releases the pool and fires the same burst again. Expected:
+- while exhausted: 503 + Retry-After after about DB_POOL_TIMEOUT (no 500s, no hang)
+- afterwards: 2xx again, with db_pool_timeouts counting the rejected checkouts
+
+    DATABASE_URL=postgresql://... python scripts/stress_pool.py
+    DATABASE_URL=postgresql://... DB_MODE=async python scripts/stress_pool.py
+
+The pool is shrunk (DB_POOL_SIZE=2, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT=1) unless
+those are already set. Exits non-zero when the expectations are not met.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+for name, value in (("DB_POOL_SIZE", "2"), ("DB_MAX_OVERFLOW", "0"), ("DB_POOL_TIMEOUT", "1")):
+    os.environ.setdefault(name, value)
+os.environ.setdefault("CATALOG_CACHE_ENABLED", "false")
+
+from _bench import latency_summary, load_app
+
+USER = "stress-pool"
+
+
+async def burst(client, problem_id: int, requests: int):
+    """Fire requests concurrently; returns ({status: count}, latencies, missing Retry-After on 503s)"""
+    def request(i: int):
+        kind = i % 4
+        if kind == 0:
+            return client.post("/api/progress/save", json={
+                "user_id": USER, "problem_id": problem_id, "language": "python", "solution_code": f"# {i}"
+            })
+        if kind == 1:
+            return client.post("/api/progress/batch", json={"items": [
+                {"user_id": USER, "problem_id": problem_id, "language": "cpp", "solution_code": f"// {i}"}
+            ]})
+        if kind == 2:
+            return client.get(f"/api/progress/{USER}/{problem_id}")
+        return client.get(f"/api/problems/{problem_id}")
+
+    statuses = Counter()
+    latencies = []
+    missing_retry_after = 0
+
+    async def one(i: int):
+        nonlocal missing_retry_after
+        started = time.perf_counter()
+        response = await request(i)
+        latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] += 1
+        if response.status_code == 503 and "retry-after" not in response.headers:
+            missing_retry_after += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return statuses, latencies, missing_retry_after
+
+
+async def hold_pool(seconds: float):
+    """Check out every pooled connection and keep it busy in pg_sleep"""
+    from database import async_engine, engine
+    from engine_profile import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+    slots = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    if async_engine is not None:
+        async def hold():
+            async with async_engine.connect() as connection:
+                await connection.exec_driver_sql(f"SELECT pg_sleep({seconds})")
+        return [asyncio.create_task(hold()) for _ in range(slots)]
+
+    def hold_sync():
+        with engine.connect() as connection:
+            connection.exec_driver_sql(f"SELECT pg_sleep({seconds})")
+    return [asyncio.create_task(asyncio.to_thread(hold_sync)) for _ in range(slots)]
+
+
+def pool_timeouts(client_metrics: str) -> float:
+    return sum(
+        float(line.split()[-1]) for line in client_metrics.splitlines()
+        if line.startswith("db_pool_timeouts_total{")
+    )
+
+
+async def run(requests: int, hold_seconds: float) -> bool:
+    import httpx
+    from sqlalchemy import text
+
+    app = load_app()
+    from database import engine
+    from engine_profile import DB_POOL_TIMEOUT
+
+    with engine.connect() as connection:
+        problem_id = connection.execute(text("SELECT min(problem_id) FROM problems")).scalar()
+
+    ok = True
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stress", timeout=60) as client:
+        await burst(client, problem_id, 8)  # warm up
+
+        holders = await hold_pool(hold_seconds)
+        await asyncio.sleep(0.2)  # let the holders check out
+        statuses, latencies, missing = await burst(client, problem_id, requests)
+        print(f"\n🔒 Pool exhausted: {dict(sorted(statuses.items()))}   {latency_summary(latencies)}")
+        if statuses.get(500) or not statuses.get(503) or missing:
+            print(f"   ❌ expected 503 + Retry-After and no 500s ({missing} 503s without Retry-After)")
+            ok = False
+        if max(latencies) > DB_POOL_TIMEOUT * 3 + 1:
+            print(f"   ❌ slowest request {max(latencies):.1f}s, DB_POOL_TIMEOUT is {DB_POOL_TIMEOUT}s")
+            ok = False
+        await asyncio.gather(*holders)
+
+        statuses, latencies, _ = await burst(client, problem_id, requests)
+        print(f"🔓 Pool released:  {dict(sorted(statuses.items()))}   {latency_summary(latencies)}")
+        if any(status >= 500 for status in statuses):
+            print("   ❌ errors after the pool was released")
+            ok = False
+
+        print(f"📈 db_pool_timeouts_total: {pool_timeouts((await client.get('/metrics')).text):.0f}")
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM user_progress WHERE user_id = :user"), {"user": USER})
+    print("✅ Pool exhaustion handled" if ok else "❌ Pool exhaustion not handled as expected")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exhaust the connection pool and check requests fail fast with 503")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per burst")
+    parser.add_argument("--hold", type=float, default=3.0, help="Seconds the pool is held busy")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args.requests, args.hold)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Statements per request must not grow with the page size (no N+1 loading).
+
+Needs a Postgres database with database/init.sql and the migrations applied:
+    TEST_DATABASE_URL=postgresql://... python -m pytest tests
+The test adds its own problems, topic, company and roadmap (problem ids from
+FIRST_PROBLEM_ID up) and deletes them afterwards. Skipped without TEST_DATABASE_URL.
+"""
+import os
+import sys
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not TEST_DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+
+# Serve from the database (not the in-memory catalog), one engine, synchronous handlers
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ["DB_MODE"] = "sync"
+os.environ["CATALOG_CACHE_ENABLED"] = "false"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from code_store import put_codes  # noqa: E402
+from models import CodeBlob, Company, Problem, Roadmap, Solution, Topic, UserProgress  # noqa: E402
+from roadmap_store import save_roadmap  # noqa: E402
+
+FIRST_PROBLEM_ID = 9_000_000
+PROBLEM_COUNT = 60
+TOPIC = "query-count-test"
+COMPANY = "query-count-test"
+ROADMAP = "query_count_test"
+USER = "query-count-test-user"
+SMALL_PAGE, LARGE_PAGE = 5, 50
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    db = SessionLocal()
+    problem_ids = list(range(FIRST_PROBLEM_ID, FIRST_PROBLEM_ID + PROBLEM_COUNT))
+    code_hashes = []
+    try:
+        topic = Topic(name=TOPIC)
+        company = Company(name=COMPANY)
+        for problem_id in problem_ids:
+            problem = Problem(
+                problem_id=problem_id,
+                title=f"Query count {problem_id}",
+                title_slug=f"query-count-{problem_id}",
+                difficulty="Medium",
+                topics=[topic],
+                companies=[company]
+            )
+            # Blob-backed code, so the blob loading is counted too
+            hashes = put_codes(db, [f"# query count {problem_id} {language}" for language in ("python", "cpp")])
+            code_hashes.extend(hashes)
+            problem.solutions = [
+                Solution(language=language, code_hash=code_hash, source="official")
+                for language, code_hash in zip(("python", "cpp"), hashes)
+            ]
+            db.add(problem)
+        db.flush()
+        save_roadmap(db, ROADMAP, "Query count test", "", "curated", problem_ids)
+        db.add_all([
+            UserProgress(user_id=USER, problem_id=problem_id, language="python", solution_code_text="pass")
+            for problem_id in problem_ids[::2]
+        ])
+        db.commit()
+        yield problem_ids
+    finally:
+        db.rollback()
+        db.query(UserProgress).filter(UserProgress.user_id == USER).delete()
+        db.query(Roadmap).filter(Roadmap.name == ROADMAP).delete()
+        db.query(Problem).filter(Problem.problem_id.in_(problem_ids)).delete(synchronize_session=False)
+        db.query(Topic).filter(Topic.name == TOPIC).delete()
+        db.query(Company).filter(Company.name == COMPANY).delete()
+        db.query(CodeBlob).filter(CodeBlob.hash.in_(code_hashes)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def client(catalog):
+    return TestClient(main.app)
+
+
+def count_statements(client, url: str) -> int:
+    """Statements the engine runs while serving url (after a warm-up request)"""
+    assert client.get(url).status_code == 200  # warms caches such as the catalog version
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def page_sizes(client, url: str):
+    return [
+        count_statements(client, f"{url}{'&' if '?' in url else '?'}limit={limit}")
+        for limit in (SMALL_PAGE, LARGE_PAGE)
+    ]
+
+
+@pytest.mark.parametrize("fields", ["full", "summary"])
+def test_problem_listing_query_count_is_constant(client, fields):
+    small, large = page_sizes(client, f"/api/problems?topic={TOPIC}&fields={fields}")
+    assert small == large
+
+
+def test_problem_listing_filtered_by_company_query_count_is_constant(client):
+    small, large = page_sizes(client, f"/api/problems?company={COMPANY}")
+    assert small == large
+
+
+def test_roadmap_problems_query_count_is_constant(client):
+    small, large = page_sizes(client, f"/api/roadmaps/{ROADMAP}/problems?user_id={USER}")
+    assert small == large